@@ -1,6 +1,7 @@
 
+import secrets
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
@@ -73,9 +74,10 @@ def get_user_service(
 
 def get_question_service(
     question_repo: QuestionRepository = Depends(get_question_repository),
-    notification_service: NotificationService = Depends(get_notification_service)
+    notification_service: NotificationService = Depends(get_notification_service),
+    user_repo: UserRepository = Depends(get_user_repository)
 ) -> QuestionService:
-    return QuestionService(question_repo, notification_service)
+    return QuestionService(question_repo, notification_service, user_repo)
 
 def get_comment_service(
     comment_repo: CommentRepository = Depends(get_comment_repository),
@@ -145,3 +147,9 @@ def get_current_user_optional(
     
     user = user_repo.get_by_username(username=username)
     return user
+
+def verify_metrics_token(x_metrics_token: Optional[str] = Header(default=None)) -> None:
+    # Metrics expose key-level cache statistics, so they stay closed until a
+    # token is configured.
+    if not settings.METRICS_TOKEN or not secrets.compare_digest(x_metrics_token or "", settings.METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
@@ -4,7 +4,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from application.services.auth_service import AuthService
 from api import deps
 from domain import schemas
-from infrastructure.cache.rate_limit import is_rate_limited
+from infrastructure.cache.async_rate_limit import is_rate_limited
 
 router = APIRouter()
 
@@ -15,7 +15,7 @@ async def login_for_access_token(
     request: Request = None
 ):
     client_ip = request.client.host if request and request.client else "unknown"
-    if is_rate_limited(f"rl:login:{client_ip}", 8, 60):
+    if await is_rate_limited(f"rl:login:{client_ip}", 8, 60):
         raise HTTPException(status_code=429, detail="Too many attempts")
     user = auth_service.authenticate_user(form_data.username, form_data.password)
     if not user:
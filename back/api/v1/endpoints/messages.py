@@ -1,10 +1,10 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from domain import schemas
 from application.services.message_service import MessageService
 from application.services.user_service import UserService
 from api import deps
-from infrastructure.cache.rate_limit import is_rate_limited
+from infrastructure.cache.async_rate_limit import is_rate_limited
 
 router = APIRouter()
 
@@ -13,7 +13,14 @@ def list_conversations(
     current_user: schemas.User = Depends(deps.get_current_user),
     message_service: MessageService = Depends(deps.get_message_service)
 ):
-    return message_service.list_conversations(current_user.id)
+    return Response(content=message_service.list_conversations(current_user.id), media_type="application/json")
+
+@router.get("/unread-counts", response_model=schemas.UnreadCounts)
+def get_unread_counts(
+    current_user: schemas.User = Depends(deps.get_current_user),
+    message_service: MessageService = Depends(deps.get_message_service)
+):
+    return message_service.get_unread_counts(current_user.id)
 
 @router.post("/start", response_model=schemas.ConversationSummary)
 def start_conversation(
@@ -51,8 +58,7 @@ def get_messages(
 ):
     try:
         messages = message_service.get_messages(conversation_id, current_user.id, skip, limit, before, include_reactions)
-        message_service.mark_read(conversation_id, current_user.id)
-        return messages
+        return Response(content=messages, media_type="application/json")
     except ValueError:
         raise HTTPException(status_code=403, detail="Not authorized")
 
@@ -64,7 +70,7 @@ async def send_message(
     message_service: MessageService = Depends(deps.get_message_service)
 ):
     try:
-        if is_rate_limited(f"rl:msg:{current_user.id}", 30, 10):
+        if await is_rate_limited(f"rl:msg:{current_user.id}", 30, 10):
             raise HTTPException(status_code=429, detail="Too many messages")
         return await message_service.create_message(
             conversation_id,
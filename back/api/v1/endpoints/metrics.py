@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from infrastructure.cache.metrics import cache_metrics
+from api import deps
+
+router = APIRouter(dependencies=[Depends(deps.verify_metrics_token)])
+
+# Counters are per process: with several workers, scrape each one or sum them.
+@router.get("/cache")
+def read_cache_metrics():
+    return cache_metrics.snapshot()
+
+@router.get("/cache/prometheus", response_class=PlainTextResponse)
+def read_cache_metrics_prometheus():
+    return PlainTextResponse(cache_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,13 +1,13 @@
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from domain import schemas
 from application.services.question_service import QuestionService
 from application.services.user_service import UserService
 from application.services.comment_service import CommentService
 from infrastructure.websockets import manager
 from api import deps
-from infrastructure.cache.rate_limit import is_rate_limited
+from infrastructure.cache.async_rate_limit import is_rate_limited
 
 router = APIRouter()
 
@@ -18,7 +18,7 @@ async def create_question(
     question_service: QuestionService = Depends(deps.get_question_service),
     user_service: UserService = Depends(deps.get_user_service)
 ):
-    if is_rate_limited(f"rl:question:{current_user.id}", 10, 60):
+    if await is_rate_limited(f"rl:question:{current_user.id}", 10, 60):
         raise HTTPException(status_code=429, detail="Too many questions")
     # Check if receiver exists
     receiver = user_service.get_user(question.receiver_id)
@@ -42,7 +42,7 @@ def read_questions_received(
     current_user: schemas.User = Depends(deps.get_current_user),
     question_service: QuestionService = Depends(deps.get_question_service)
 ):
-    return question_service.get_questions_received(current_user.id, skip, limit, before)
+    return Response(content=question_service.get_questions_received(current_user.id, skip, limit, before), media_type="application/json")
 
 @router.post("/{question_id}/answer", response_model=schemas.Answer)
 def create_answer(
@@ -68,7 +68,7 @@ def get_feed(
     current_user: schemas.User = Depends(deps.get_current_user),
     question_service: QuestionService = Depends(deps.get_question_service)
 ):
-    return question_service.get_feed(current_user.id, skip, limit, before)
+    return Response(content=question_service.get_feed(current_user.id, skip, limit, before), media_type="application/json")
 
 @router.delete("/{question_id}")
 def delete_question(
@@ -83,12 +83,12 @@ def delete_question(
     return {"status": "ok"}
 
 @router.post("/answers/{answer_id}/like")
-def like_answer(
+async def like_answer(
     answer_id: int,
     current_user: schemas.User = Depends(deps.get_current_user),
     question_service: QuestionService = Depends(deps.get_question_service)
 ):
-    question_service.like_answer(current_user.id, answer_id)
+    await question_service.like_answer(current_user.id, answer_id)
     return {"status": "ok"}
 
 @router.delete("/answers/{answer_id}/like")
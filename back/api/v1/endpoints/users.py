@@ -5,14 +5,14 @@ from uuid import uuid4
 import mimetypes
 import boto3
 from botocore.config import Config
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.encoders import jsonable_encoder
 from core.config import settings
 from domain import schemas
 from application.services.user_service import UserService
 from application.services.question_service import QuestionService
 from infrastructure.websockets import manager
-from infrastructure.cache.redis_client import cache_delete, cache_get_json, cache_set_json
+from infrastructure.cache.redis_client import cache_delete, cache_get_json, cache_namespace, cache_set_json
 from api import deps
 
 router = APIRouter()
@@ -180,7 +180,7 @@ def search_users(
     limit: int = 10, 
     user_service: UserService = Depends(deps.get_user_service)
 ):
-    cache_key = f"search_users:{q}:{skip}:{limit}"
+    cache_key = f"{cache_namespace('search_users')}:{q}:{skip}:{limit}"
     cached = cache_get_json(cache_key)
     if cached is not None:
         return [schemas.UserProfile.model_validate(item) for item in cached]
@@ -294,4 +294,4 @@ def read_user_answers(
         raise HTTPException(status_code=404, detail="User not found")
     
     viewer_id = current_user.id if current_user else None
-    return question_service.get_user_answers(user.id, viewer_id, skip, limit, before)
+    return Response(content=question_service.get_user_answers(user.id, viewer_id, skip, limit, before), media_type="application/json")
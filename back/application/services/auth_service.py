@@ -7,7 +7,7 @@ from datetime import timedelta, datetime
 import uuid
 import logging
 from pydantic import EmailStr
-from infrastructure.cache.redis_queue import enqueue_job
+from infrastructure.cache.async_redis_queue import enqueue_job
 from infrastructure.mail.reset_email import send_reset_email
 
 logger = logging.getLogger(__name__)
@@ -49,7 +49,7 @@ class AuthService:
         
         self.password_reset_repo.create(user.id, token, expires_at)
         
-        queued = enqueue_job("email_queue", {"type": "reset_password", "email": email, "token": token})
+        queued = await enqueue_job("email_queue", {"type": "reset_password", "email": email, "token": token})
         if not queued:
             await send_reset_email(email, token)
 
@@ -1,12 +1,28 @@
 import json
+import orjson
 from fastapi.concurrency import run_in_threadpool
 from domain import schemas
-from infrastructure.cache.redis_client import cache_delete, cache_delete_prefix, cache_get_json, cache_set_json
+from infrastructure.cache.redis_client import cache_bump_namespaces, cache_delete, cache_get_or_set_bytes, cache_get_or_set_json, cache_namespace, encode_models
+from infrastructure.cache.entity_cache import get_users, user_entity
+from infrastructure.cache import async_redis_client
+from infrastructure.cache.read_receipts import record_read
+from infrastructure.cache.recent_messages import (
+    append_recent_message,
+    drop_recent_messages,
+    mark_recent_messages_read,
+    patch_recent_message,
+    read_recent_message_ids,
+    read_recent_message_values,
+    recent_messages_enabled,
+    remove_recent_message,
+    store_recent_messages,
+)
 from infrastructure.repositories.conversation_repository import ConversationRepository
 from infrastructure.repositories.message_repository import MessageRepository
 from infrastructure.repositories.user_repository import UserRepository
 from infrastructure.repositories.user_block_repository import UserBlockRepository
 from infrastructure.websockets import manager
+from core.config import settings
 from datetime import datetime
 
 CONVERSATIONS_TTL_SECONDS = 10
@@ -22,11 +38,14 @@ class MessageService:
     def _conversation_cache_key(self, user_id: int) -> str:
         return f"conversations:{user_id}"
 
-    def _messages_cache_prefix(self, conversation_id: int) -> str:
-        return f"messages:{conversation_id}:"
+    def _messages_cache_namespace(self, conversation_id: int) -> str:
+        return f"messages:{conversation_id}"
 
-    def _messages_cache_key(self, conversation_id: int, skip: int, limit: int, before: str | None, include_reactions: bool) -> str:
-        return f"messages:{conversation_id}:{skip}:{limit}:{before or ''}:{int(include_reactions)}"
+    def _messages_cache_key(self, conversation, skip: int, limit: int, before: str | None, include_reactions: bool) -> str:
+        # New messages do not bump the namespace. They never land before a
+        # cursor, and pages counted from the start are keyed by the last message.
+        last_message_id = "" if before else conversation.last_message_id or ""
+        return f"{cache_namespace(self._messages_cache_namespace(conversation.id))}:{skip}:{limit}:{before or ''}:{int(include_reactions)}:{last_message_id}"
 
     def _get_other_user_id(self, conversation, user_id: int):
         if conversation.user1_id == user_id:
@@ -53,61 +72,181 @@ class MessageService:
         other_user = self.user_repo.get_by_id(other_user_id)
         if not other_user:
             raise ValueError("Not found")
-        last_message = self.message_repo.get_last_message(conversation_id)
+        last_message = self.message_repo.get_by_id(conversation.last_message_id) if conversation.last_message_id else None
         return schemas.ConversationSummary(
             id=conversation.id,
             other_user=schemas.User.model_validate(other_user),
-            last_message=schemas.Message.model_validate(last_message) if last_message else None
+            last_message=self._build_message_schema(last_message, include_reactions=False) if last_message else None,
+            unread_count=self._unread_count(conversation, user_id)
         )
 
-    def list_conversations(self, user_id: int):
-        cache_key = self._conversation_cache_key(user_id)
-        cached = cache_get_json(cache_key)
-        if cached is not None:
-            return [schemas.ConversationSummary.model_validate(item) for item in cached]
-        conversations = self.conversation_repo.get_for_user(user_id)
-        results = []
-        for conversation in conversations:
-            other_user_id = self._get_other_user_id(conversation, user_id)
-            other_user = self.user_repo.get_by_id(other_user_id)
-            if not other_user:
-                continue
-            last_message = self.message_repo.get_last_message(conversation.id)
-            summary = schemas.ConversationSummary(
-                id=conversation.id,
-                other_user=schemas.User.model_validate(other_user),
-                last_message=schemas.Message.model_validate(last_message) if last_message else None
-            )
-            results.append(summary)
-        cache_set_json(cache_key, [item.model_dump() for item in results], CONVERSATIONS_TTL_SECONDS)
-        return results
+    def list_conversations(self, user_id: int) -> bytes:
+        def load():
+            return [
+                {
+                    "id": conversation.id,
+                    "other_user_id": other_user.id,
+                    "last_message": self._build_message_schema(last_message, include_reactions=False).model_dump(mode="json") if last_message else None,
+                    "unread_count": self._unread_count(conversation, user_id),
+                }
+                for conversation, last_message, other_user in self.conversation_repo.get_inbox(user_id)
+            ]
+
+        # The list only references the other participants; their profiles
+        # come from the shared user entities.
+        conversations = cache_get_or_set_json(self._conversation_cache_key(user_id), CONVERSATIONS_TTL_SECONDS, load)
+        users = get_users([c["other_user_id"] for c in conversations], self._load_users)
+        return orjson.dumps([
+            {"id": c["id"], "other_user": users[c["other_user_id"]], "last_message": c["last_message"], "unread_count": c["unread_count"]}
+            for c in conversations
+            if c["other_user_id"] in users
+        ])
+
+    def _unread_count(self, conversation, user_id: int) -> int:
+        if conversation.user1_id == user_id:
+            return conversation.user1_unread_count
+        return conversation.user2_unread_count
+
+    def get_unread_counts(self, user_id: int):
+        user = self.user_repo.get_by_id(user_id)
+        return schemas.UnreadCounts(
+            total=user.unread_messages_count if user else 0,
+            conversations=self.conversation_repo.get_unread_counts(user_id)
+        )
+
+    def _load_users(self, user_ids: list[int]):
+        return {user.id: user_entity(user) for user in self.user_repo.get_by_ids(user_ids)}
 
     def _build_message_schema(self, message, include_reactions: bool = True):
-        message_data = schemas.Message.model_validate(message).model_dump()
+        return self._build_message_schemas([message], include_reactions)[0]
+
+    def _build_message_schemas(self, messages, include_reactions: bool = True):
+        # Built from the columns: validating the ORM object directly would
+        # lazy load its MessageReaction rows, which are not summaries.
+        summaries = {}
         if include_reactions:
-            message_data["reactions"] = self.message_repo.get_reaction_summary(message.id)
-        else:
-            message_data["reactions"] = []
-        return schemas.Message(**message_data)
+            summaries = self.message_repo.get_reaction_summaries(
+                [m.id for m in messages if m.reaction_counts is None]
+            )
+        results = []
+        for message in messages:
+            message_data = {column.name: getattr(message, column.name) for column in message.__table__.columns}
+            if not include_reactions:
+                message_data["reactions"] = []
+            elif message.reaction_counts is not None:
+                message_data["reactions"] = message.reaction_counts
+            else:
+                message_data["reactions"] = summaries.get(message.id, [])
+            results.append(schemas.Message.model_validate(message_data))
+        return results
 
-    def get_messages(self, conversation_id: int, user_id: int, skip: int = 0, limit: int = 50, before: str | None = None, include_reactions: bool = True):
+    def get_messages(self, conversation_id: int, user_id: int, skip: int = 0, limit: int = 50, before: str | None = None, include_reactions: bool = True) -> bytes:
         conversation = self.conversation_repo.get_by_id(conversation_id)
         if not conversation:
             raise ValueError("Not found")
         self._get_other_user_id(conversation, user_id)
-        cache_key = self._messages_cache_key(conversation_id, skip, limit, before, include_reactions)
-        cached = cache_get_json(cache_key)
-        if cached is not None:
-            return [schemas.Message.model_validate(item) for item in cached]
+        def load():
+            if before:
+                before_created_at, before_id = self._parse_cursor(before)
+                messages = self.message_repo.get_by_conversation_before(conversation_id, before_created_at, before_id, limit)
+                messages = list(reversed(messages))
+            else:
+                messages = self.message_repo.get_by_conversation(conversation_id, skip, limit)
+            return encode_models(self._build_message_schemas(messages, include_reactions))
+
+        body = self._get_recent_messages(conversation, skip, limit, before, include_reactions)
+        if body is None:
+            cache_key = self._messages_cache_key(conversation, skip, limit, before, include_reactions)
+            body = cache_get_or_set_bytes(cache_key, MESSAGES_TTL_SECONDS, load)
+        self._record_read(conversation, user_id, body)
+        return body
+
+    def _get_recent_messages(self, conversation, skip: int, limit: int, before: str | None, include_reactions: bool) -> bytes | None:
+        # Pages that fall inside the recent messages buffer are served from it;
+        # None sends the request down the database path.
+        values = None
+        recent = read_recent_message_ids(conversation.id)
+        if recent is not None:
+            message_ids, _ = recent
+            # The buffer is only trusted when it ends at the conversation's last
+            # message, which also catches appends it missed.
+            if (message_ids[-1] if message_ids else None) != conversation.last_message_id:
+                recent = None
+        if recent is None:
+            filled = self._fill_recent_messages(conversation)
+            if filled is None:
+                return None
+            messages, complete = filled
+            values = dict(messages)
+            recent = [message_id for message_id, _ in messages], complete
+        page_ids = self._recent_page_ids(*recent, skip, limit, before)
+        if page_ids is None:
+            return None
+        if values is not None:
+            page = [values[message_id] for message_id in page_ids]
+        else:
+            page = read_recent_message_values(conversation.id, page_ids)
+            if page is None:
+                return None
+        body = b"[" + b",".join(page) + b"]"
+        if not include_reactions:
+            body = orjson.dumps([{**message, "reactions": []} for message in orjson.loads(body)])
+        return body
+
+    def _recent_page_ids(self, message_ids: list[int], complete: bool, skip: int, limit: int, before: str | None):
+        # Deep history pages are turned away on ids alone.
         if before:
-            before_created_at, before_id = self._parse_cursor(before)
-            messages = self.message_repo.get_by_conversation_before(conversation_id, before_created_at, before_id, limit)
-            messages = list(reversed(messages))
+            _, before_id = self._parse_cursor(before)
+            older = [message_id for message_id in message_ids if message_id < before_id]
+            if len(older) < limit and not complete:
+                return None
+            return older[max(len(older) - limit, 0):]
+        if not complete:
+            return None
+        return message_ids[skip:skip + limit]
+
+    def _fill_recent_messages(self, conversation):
+        if not recent_messages_enabled():
+            return None
+        size = settings.RECENT_MESSAGES_BUFFER_SIZE
+        messages = self.message_repo.get_latest(conversation.id, size)
+        recent = [
+            (message.id, self._encode_message(message_schema))
+            for message, message_schema in zip(messages, self._build_message_schemas(messages))
+        ]
+        complete = len(messages) < size
+        store_recent_messages(conversation.id, recent, complete)
+        return recent, complete
+
+    def _encode_message(self, message_schema) -> bytes:
+        return orjson.dumps(message_schema.model_dump(mode="json"))
+
+    def _refresh_recent_message(self, message):
+        patch_recent_message(message.conversation_id, message.id, self._encode_message(self._build_message_schema(message)))
+
+    def _record_read(self, conversation, user_id: int, body: bytes):
+        # Fetching a page reads up to its newest message. Pages at or below the
+        # high-water mark (scrolling back through history) write nothing and
+        # leave the page caches alone.
+        if not self._unread_count(conversation, user_id):
+            return
+        newest_id = max((m["id"] for m in orjson.loads(body) if m["receiver_id"] == user_id), default=None)
+        if conversation.user1_id == user_id:
+            last_read_id = conversation.user1_last_read_message_id
         else:
-            messages = self.message_repo.get_by_conversation(conversation_id, skip, limit)
-        results = [self._build_message_schema(m, include_reactions) for m in messages]
-        cache_set_json(cache_key, [item.model_dump() for item in results], MESSAGES_TTL_SECONDS)
-        return results
+            last_read_id = conversation.user2_last_read_message_id
+        if newest_id is None or newest_id <= (last_read_id or 0):
+            return
+        # Buffered receipts are written in batches by read_receipt_worker.
+        if settings.READ_RECEIPTS_WRITE_BEHIND and record_read(conversation.id, user_id, newest_id) is not None:
+            return
+        if self.message_repo.mark_read(conversation.id, user_id, newest_id):
+            self._invalidate_read(conversation.id, user_id, newest_id)
+
+    def _invalidate_read(self, conversation_id: int, user_id: int, up_to_message_id: int):
+        cache_bump_namespaces([self._messages_cache_namespace(conversation_id)])
+        cache_delete([self._conversation_cache_key(user_id)])
+        mark_recent_messages_read(conversation_id, user_id, up_to_message_id)
 
     async def create_message(self, conversation_id: int, sender_id: int, content: str, reply_to_message_id: int | None = None):
         conversation = self.conversation_repo.get_by_id(conversation_id)
@@ -133,10 +272,11 @@ class MessageService:
                 "avatar_url": sender.avatar_url
             }
         message_schema = self._build_message_schema(new_message)
+        message_data = message_schema.model_dump(mode="json")
         payload = json.dumps({
             "type": "dm",
             "conversation_id": conversation_id,
-            "message": message_schema.model_dump(),
+            "message": message_data,
             "sender": sender_payload
         })
         try:
@@ -145,8 +285,8 @@ class MessageService:
                 await manager.send_personal_message(payload, sender_id)
         except Exception:
             pass
-        cache_delete_prefix(self._messages_cache_prefix(conversation_id))
-        cache_delete([self._conversation_cache_key(sender_id), self._conversation_cache_key(receiver_id)])
+        await run_in_threadpool(append_recent_message, conversation_id, message_schema.id, orjson.dumps(message_data))
+        await async_redis_client.cache_delete([self._conversation_cache_key(sender_id), self._conversation_cache_key(receiver_id)])
         return message_schema
 
 
@@ -155,8 +295,10 @@ class MessageService:
         if not conversation:
             raise ValueError("Not found")
         self._get_other_user_id(conversation, user_id)
-        self.message_repo.mark_read(conversation_id, user_id)
-        cache_delete_prefix(self._messages_cache_prefix(conversation_id))
+        # Reading an already read conversation changes nothing, so no cache
+        # is touched either.
+        if self.message_repo.mark_read(conversation_id, user_id):
+            self._invalidate_read(conversation_id, user_id, conversation.last_message_id)
 
     def delete_message(self, message_id: int, user_id: int):
         message = self.message_repo.get_by_id(message_id)
@@ -167,7 +309,9 @@ class MessageService:
             raise ValueError("Not found")
         self._get_other_user_id(conversation, user_id)
         deleted = self.message_repo.delete_message(message_id, user_id)
-        cache_delete_prefix(self._messages_cache_prefix(message.conversation_id))
+        cache_bump_namespaces([self._messages_cache_namespace(message.conversation_id)])
+        if deleted:
+            remove_recent_message(conversation.id, message_id)
         cache_delete([self._conversation_cache_key(conversation.user1_id), self._conversation_cache_key(conversation.user2_id)])
         return deleted
 
@@ -178,7 +322,8 @@ class MessageService:
         self._get_other_user_id(conversation, user_id)
         self.message_repo.delete_by_conversation(conversation_id)
         deleted = self.conversation_repo.delete_conversation(conversation_id)
-        cache_delete_prefix(self._messages_cache_prefix(conversation_id))
+        cache_bump_namespaces([self._messages_cache_namespace(conversation_id)])
+        drop_recent_messages(conversation_id)
         cache_delete([self._conversation_cache_key(conversation.user1_id), self._conversation_cache_key(conversation.user2_id)])
         return deleted
 
@@ -191,7 +336,8 @@ class MessageService:
             raise ValueError("Not found")
         self._get_other_user_id(conversation, user_id)
         self.message_repo.add_reaction(message_id, user_id, emoji)
-        cache_delete_prefix(self._messages_cache_prefix(message.conversation_id))
+        cache_bump_namespaces([self._messages_cache_namespace(message.conversation_id)])
+        self._refresh_recent_message(message)
         return self.message_repo.get_reaction_summary(message_id)
 
     def remove_reaction(self, message_id: int, user_id: int, emoji: str):
@@ -203,7 +349,8 @@ class MessageService:
             raise ValueError("Not found")
         self._get_other_user_id(conversation, user_id)
         self.message_repo.remove_reaction(message_id, user_id, emoji)
-        cache_delete_prefix(self._messages_cache_prefix(message.conversation_id))
+        cache_bump_namespaces([self._messages_cache_namespace(message.conversation_id)])
+        self._refresh_recent_message(message)
         return self.message_repo.get_reaction_summary(message_id)
 
     def _parse_cursor(self, cursor: str):
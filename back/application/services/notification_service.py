@@ -2,8 +2,8 @@ from infrastructure.repositories.notification_repository import NotificationRepo
 from domain import schemas
 from infrastructure.websockets import manager
 from fastapi.concurrency import run_in_threadpool
-from infrastructure.cache.redis_client import cache_delete_prefix, cache_get_json, cache_set_json
-from infrastructure.cache.redis_queue import enqueue_job
+from infrastructure.cache.redis_client import cache_bump_namespaces, cache_get_json, cache_namespace, cache_set_json
+from infrastructure.cache import async_redis_client, async_redis_queue
 
 NOTIFICATIONS_TTL_SECONDS = 15
 
@@ -12,10 +12,10 @@ class NotificationService:
         self.notification_repo = notification_repo
 
     def _cache_key(self, user_id: int, skip: int, limit: int) -> str:
-        return f"notifications:{user_id}:{skip}:{limit}"
+        return f"{cache_namespace(self._cache_namespace(user_id))}:{skip}:{limit}"
 
-    def _cache_prefix(self, user_id: int) -> str:
-        return f"notifications:{user_id}:"
+    def _cache_namespace(self, user_id: int) -> str:
+        return f"notifications:{user_id}"
 
     async def create_notification(self, user_id: int, content: str, notification_type: str = "info"):
         # 1. Create in DB
@@ -31,8 +31,8 @@ class NotificationService:
         # but for now let's keep it simple or format it.
         # "Notification: {content}"
         await manager.send_personal_message(content, user_id)
-        cache_delete_prefix(self._cache_prefix(user_id))
-        enqueue_job("notification_queue", {"type": "notification", "user_id": user_id, "content": content})
+        await async_redis_client.cache_bump_namespaces([self._cache_namespace(user_id)])
+        await async_redis_queue.enqueue_job("notification_queue", {"type": "notification", "user_id": user_id, "content": content})
         
         return notification
 
@@ -84,15 +84,15 @@ class NotificationService:
     def mark_as_read(self, notification_id: int, user_id: int):
         notification = self.notification_repo.mark_as_read(notification_id, user_id)
         if notification:
-            cache_delete_prefix(self._cache_prefix(user_id))
+            cache_bump_namespaces([self._cache_namespace(user_id)])
         return notification
         
     def mark_all_as_read(self, user_id: int):
         result = self.notification_repo.mark_all_as_read(user_id)
-        cache_delete_prefix(self._cache_prefix(user_id))
+        cache_bump_namespaces([self._cache_namespace(user_id)])
         return result
 
     def mark_many_as_read(self, user_id: int, notification_ids: list[int]):
         result = self.notification_repo.mark_many_as_read(user_id, notification_ids)
-        cache_delete_prefix(self._cache_prefix(user_id))
+        cache_bump_namespaces([self._cache_namespace(user_id)])
         return result
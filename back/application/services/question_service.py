@@ -1,37 +1,46 @@
 
 from infrastructure.repositories.question_repository import QuestionRepository
+from infrastructure.repositories.user_repository import UserRepository
 from application.services.notification_service import NotificationService
 from domain import schemas
 from fastapi.concurrency import run_in_threadpool
-from infrastructure.cache.redis_client import cache_delete_prefix, cache_get_json, cache_set_json
+from infrastructure.cache.redis_client import cache_bump_namespaces, cache_get_or_set_json, cache_namespace
+from infrastructure.cache import async_redis_client
+from infrastructure.cache.entity_cache import answer_entity, get_answers, get_users, invalidate_answers, store_answers, user_entity
+from infrastructure.cache.like_buffer import get_like_overlay, record_like
+from infrastructure.cache.feed_timeline import drop_timeline, get_pull_authors, is_pull_author, mark_pull_author, push_to_timelines, read_timeline, read_timeline_before, rebuild_timeline, remove_from_timelines
+from core.config import settings
 from datetime import datetime
+import heapq
+import orjson
 
 FEED_TTL_SECONDS = 10
 USER_ANSWERS_TTL_SECONDS = 10
 QUESTIONS_RECEIVED_TTL_SECONDS = 15
 
 class QuestionService:
-    def __init__(self, question_repo: QuestionRepository, notification_service: NotificationService):
+    def __init__(self, question_repo: QuestionRepository, notification_service: NotificationService, user_repo: UserRepository):
         self.question_repo = question_repo
         self.notification_service = notification_service
+        self.user_repo = user_repo
 
     def _feed_cache_key(self, user_id: int, skip: int, limit: int, before: str | None) -> str:
-        return f"feed:{user_id}:{skip}:{limit}:{before or ''}"
+        return f"{cache_namespace(self._feed_cache_namespace(user_id))}:{skip}:{limit}:{before or ''}"
 
-    def _feed_cache_prefix(self) -> str:
-        return "feed:"
+    def _feed_cache_namespace(self, user_id: int) -> str:
+        return f"feed:{user_id}"
 
     def _user_answers_cache_key(self, user_id: int, skip: int, limit: int, before: str | None) -> str:
-        return f"user_answers:{user_id}:{skip}:{limit}:{before or ''}"
+        return f"{cache_namespace(self._user_answers_cache_namespace(user_id))}:{skip}:{limit}:{before or ''}"
 
-    def _user_answers_cache_prefix(self, user_id: int) -> str:
-        return f"user_answers:{user_id}:"
+    def _user_answers_cache_namespace(self, user_id: int) -> str:
+        return f"user_answers:{user_id}"
 
     def _questions_received_cache_key(self, user_id: int, skip: int, limit: int, before: str | None) -> str:
-        return f"questions_received:{user_id}:{skip}:{limit}:{before or ''}"
+        return f"{cache_namespace(self._questions_received_cache_namespace(user_id))}:{skip}:{limit}:{before or ''}"
 
-    def _questions_received_cache_prefix(self, user_id: int) -> str:
-        return f"questions_received:{user_id}:"
+    def _questions_received_cache_namespace(self, user_id: int) -> str:
+        return f"questions_received:{user_id}"
 
     async def create_question(self, question: schemas.QuestionCreate, asker_id: int):
         new_question = await run_in_threadpool(self.question_repo.create_question, question, asker_id)
@@ -42,73 +51,231 @@ class QuestionService:
             content="Tienes una nueva pregunta", 
             notification_type="question"
         )
-        cache_delete_prefix(self._questions_received_cache_prefix(question.receiver_id))
+        await async_redis_client.cache_bump_namespaces([self._questions_received_cache_namespace(question.receiver_id)])
         
         return new_question
 
-    def get_questions_received(self, user_id: int, skip: int = 0, limit: int = 10, before: str | None = None):
+    def get_questions_received(self, user_id: int, skip: int = 0, limit: int = 10, before: str | None = None) -> bytes:
+        def load():
+            if before:
+                before_created_at, before_id = self._parse_cursor(before)
+                questions = self.question_repo.get_questions_received_before(user_id, before_created_at, before_id, limit)
+            else:
+                questions = self.question_repo.get_questions_received(user_id, skip, limit)
+            return [schemas.Question.model_validate(q).model_dump(mode="json") for q in questions]
+
+        # Pages only reference users by id; profiles come from the user entities.
         cache_key = self._questions_received_cache_key(user_id, skip, limit, before)
-        cached = cache_get_json(cache_key)
-        if cached is not None:
-            return [schemas.QuestionDisplay.model_validate(item) for item in cached]
-        if before:
-            before_created_at, before_id = self._parse_cursor(before)
-            questions = self.question_repo.get_questions_received_before(user_id, before_created_at, before_id, limit)
-        else:
-            questions = self.question_repo.get_questions_received(user_id, skip, limit)
-        results = [schemas.QuestionDisplay.model_validate(q) for q in questions]
-        cache_set_json(cache_key, [item.model_dump() for item in results], QUESTIONS_RECEIVED_TTL_SECONDS)
-        return results
+        questions = cache_get_or_set_json(cache_key, QUESTIONS_RECEIVED_TTL_SECONDS, load)
+        users = get_users(
+            [q["receiver_id"] for q in questions] + [q["asker_id"] for q in questions if q["asker_id"]],
+            self._load_users
+        )
+        results = [
+            self._question_display(question, users)
+            for question in questions
+            if question["receiver_id"] in users
+        ]
+        return orjson.dumps(results)
+
+    def _load_users(self, user_ids: list[int]):
+        return {user.id: user_entity(user) for user in self.user_repo.get_by_ids(user_ids)}
+
+    def _load_answers(self, answer_ids: list[int]):
+        return {answer.id: answer_entity(answer) for answer in self.question_repo.get_answers_by_ids(answer_ids)}
+
+    def _question_display(self, question: dict, users: dict):
+        return {
+            "id": question["id"],
+            "content": question["content"],
+            "is_anonymous": question["is_anonymous"],
+            "created_at": question["created_at"],
+            "receiver": users[question["receiver_id"]],
+            "asker": users.get(question["asker_id"]),
+        }
+
+    def _hydrate_answers(self, answer_ids: list[int], viewer_id):
+        # Pages are lists of ids; every answer and user is stored once and
+        # shared by all the pages (and viewers) that reference it.
+        answers = get_answers(answer_ids, self._load_answers)
+        user_ids = []
+        for answer in answers.values():
+            user_ids += [answer["author_id"], answer["question"]["receiver_id"]]
+            if answer["question"]["asker_id"]:
+                user_ids.append(answer["question"]["asker_id"])
+        users = get_users(user_ids, self._load_users)
+        results = []
+        for answer_id in answer_ids:
+            answer = answers.get(answer_id)
+            if answer is None or answer["author_id"] not in users or answer["question"]["receiver_id"] not in users:
+                continue
+            results.append({
+                "id": answer["id"],
+                "content": answer["content"],
+                "created_at": answer["created_at"],
+                "question": self._question_display(answer["question"], users),
+                "author": users[answer["author_id"]],
+                "likes_count": answer["like_count"],
+                "is_liked": False,
+            })
+        return self._apply_like_overlay(self._mark_liked(results, viewer_id), viewer_id)
 
     def create_answer(self, answer: schemas.AnswerCreate, author_id: int):
         # Verify question exists? Repo might handle foreign key error, but good to check
         # For MVP/Simplicity assume valid
         created = self.question_repo.create_answer(answer, author_id)
-        cache_delete_prefix(self._feed_cache_prefix())
-        cache_delete_prefix(self._user_answers_cache_prefix(author_id))
+        # Authors with too many followers are not fanned out; their answers are
+        # pulled and merged into each feed at read time instead.
+        if self.question_repo.count_followers(author_id) > settings.FEED_FANOUT_FOLLOWER_THRESHOLD:
+            mark_pull_author(author_id)
+        else:
+            for follower_ids in self.question_repo.get_follower_id_batches(author_id):
+                push_to_timelines(follower_ids, created.id, created.created_at.timestamp())
+                cache_bump_namespaces([self._feed_cache_namespace(follower_id) for follower_id in follower_ids])
+        cache_bump_namespaces([self._user_answers_cache_namespace(author_id)])
         return created
 
-    def get_feed(self, user_id: int, skip: int = 0, limit: int = 10, before: str | None = None):
+    def _invalidate_answer_caches(self, author_id: int, answer_ids: list[int]):
+        # Only the author's followers can have one of their answers in a cached
+        # feed page. Pulled authors are left to the short feed TTL, bumping
+        # every follower on each deletion would cost what fan-out was avoiding.
+        cache_bump_namespaces([self._user_answers_cache_namespace(author_id)])
+        if is_pull_author(author_id):
+            return
+        for follower_ids in self.question_repo.get_follower_id_batches(author_id):
+            remove_from_timelines(follower_ids, answer_ids)
+            cache_bump_namespaces([self._feed_cache_namespace(follower_id) for follower_id in follower_ids])
+
+    def get_feed(self, user_id: int, skip: int = 0, limit: int = 10, before: str | None = None) -> bytes:
+        def load():
+            answer_ids = self._get_feed_from_timeline(user_id, skip, limit, before)
+            if answer_ids is None:
+                if before:
+                    before_created_at, before_id = self._parse_cursor(before)
+                    answers = self.question_repo.get_feed_before(user_id, before_created_at, before_id, limit)
+                else:
+                    answers = self.question_repo.get_feed(user_id, skip, limit)
+                store_answers(answers)
+                answer_ids = [answer.id for answer in answers]
+            return answer_ids
+
         cache_key = self._feed_cache_key(user_id, skip, limit, before)
-        cached = cache_get_json(cache_key)
-        if cached is not None:
-            return [schemas.AnswerDisplay.model_validate(item) for item in cached]
+        answer_ids = cache_get_or_set_json(cache_key, FEED_TTL_SECONDS, load)
+        return orjson.dumps(self._hydrate_answers(answer_ids, user_id))
+
+    def _get_feed_from_timeline(self, user_id: int, skip: int, limit: int, before: str | None):
+        # Serve the page from the materialized timeline merged with the authors
+        # that are pulled at read time; None means the caller has to fall back
+        # to querying answers directly.
+        pull_author_ids = self._get_followed_pull_authors(user_id)
+        if pull_author_ids is None:
+            return None
+        before_created_at = before_id = before_score = None
         if before:
             before_created_at, before_id = self._parse_cursor(before)
-            answers = self.question_repo.get_feed_before(user_id, before_created_at, before_id, limit)
+            before_score = before_created_at.timestamp()
+        window = limit if before else skip + limit
+        if before:
+            timeline = read_timeline_before(user_id, before_score, before_id, window)
         else:
-            answers = self.question_repo.get_feed(user_id, skip, limit)
-        results = self._enrich_answers(answers, user_id)
-        cache_set_json(cache_key, [item.model_dump() for item in results], FEED_TTL_SECONDS)
-        return results
+            timeline = read_timeline(user_id, 0, window)
+        if timeline is None:
+            rebuilt = self._rebuild_timeline(user_id, pull_author_ids)
+            if rebuilt is None:
+                return None
+            if before:
+                rebuilt_page = [
+                    (answer_id, score) for answer_id, score in rebuilt
+                    if score < before_score or (score == before_score and answer_id < before_id)
+                ]
+            else:
+                rebuilt_page = rebuilt
+            timeline = rebuilt_page[:window], len(rebuilt) >= settings.FEED_TIMELINE_MAX_LENGTH
+        entries, trimmed = timeline
+        # Past the tail of a trimmed timeline only the database knows what comes next.
+        if len(entries) < window and trimmed:
+            return None
+        sources = [entries]
+        for author_id in pull_author_ids:
+            rows = self.question_repo.get_author_feed_entries(author_id, window, before_created_at, before_id)
+            sources.append([(answer_id, created_at.timestamp()) for answer_id, created_at in rows])
+        page = [answer_id for answer_id, _ in self._merge_feed_entries(sources, window)[0 if before else skip:]]
+        if len(get_answers(page, self._load_answers)) < len(page):
+            # A deleted answer the timeline still holds (a pulled author's, say);
+            # drop it so the next read rebuilds it instead of every page
+            # falling back until the key expires.
+            drop_timeline(user_id)
+            return None
+        return page
+
+    def _merge_feed_entries(self, sources, limit: int):
+        # k-way merge over sources already sorted newest first, so the work is
+        # bounded by the page window rather than by the size of each source.
+        merged = []
+        seen = set()
+        for answer_id, score in heapq.merge(*sources, key=lambda entry: (entry[1], entry[0]), reverse=True):
+            if answer_id in seen:
+                continue
+            seen.add(answer_id)
+            merged.append((answer_id, score))
+            if len(merged) >= limit:
+                break
+        return merged
+
+    def _get_followed_pull_authors(self, user_id: int):
+        pull_author_ids = get_pull_authors()
+        if not pull_author_ids:
+            return pull_author_ids
+        return self.question_repo.get_followed_among(user_id, pull_author_ids)
+
+    def _rebuild_timeline(self, user_id: int, pull_author_ids: list[int]):
+        rows = self.question_repo.get_feed_entries(user_id, settings.FEED_TIMELINE_MAX_LENGTH, pull_author_ids)
+        entries = [(answer_id, created_at.timestamp()) for answer_id, created_at in rows]
+        if not rebuild_timeline(user_id, entries, len(entries) >= settings.FEED_TIMELINE_MAX_LENGTH):
+            return None
+        return entries
+
+    def get_user_answers(self, user_id: int, viewer_id: int = None, skip: int = 0, limit: int = 10, before: str | None = None) -> bytes:
+        def load():
+            if before:
+                before_created_at, before_id = self._parse_cursor(before)
+                answers = self.question_repo.get_user_answers_before(user_id, before_created_at, before_id, limit)
+            else:
+                answers = self.question_repo.get_user_answers(user_id, skip, limit)
+            store_answers(answers)
+            return [answer.id for answer in answers]
 
-    def get_user_answers(self, user_id: int, viewer_id: int = None, skip: int = 0, limit: int = 10, before: str | None = None):
+        # The page is shared by every viewer; is_liked is filled in per request.
         cache_key = self._user_answers_cache_key(user_id, skip, limit, before)
-        cached = cache_get_json(cache_key)
-        if cached is not None:
-            return [schemas.AnswerDisplay.model_validate(item) for item in cached]
-        if before:
-            before_created_at, before_id = self._parse_cursor(before)
-            answers = self.question_repo.get_user_answers_before(user_id, before_created_at, before_id, limit)
-        else:
-            answers = self.question_repo.get_user_answers(user_id, skip, limit)
-        results = self._enrich_answers(answers, viewer_id)
-        cache_set_json(cache_key, [item.model_dump() for item in results], USER_ANSWERS_TTL_SECONDS)
+        answer_ids = cache_get_or_set_json(cache_key, USER_ANSWERS_TTL_SECONDS, load)
+        return orjson.dumps(self._hydrate_answers(answer_ids, viewer_id))
+
+    def _mark_liked(self, results, viewer_id):
+        liked_ids = set()
+        if viewer_id and results:
+            liked_ids = self.question_repo.get_liked_answer_ids(viewer_id, [item["id"] for item in results])
+        for item in results:
+            item["is_liked"] = item["id"] in liked_ids
         return results
 
-    def _enrich_answers(self, answers, viewer_id):
-        results = []
-        for answer in answers:
-            display = schemas.AnswerDisplay.model_validate(answer)
-            display.likes_count = len(answer.likes)
-            if viewer_id:
-                display.is_liked = any(l.user_id == viewer_id for l in answer.likes)
-            else:
-                display.is_liked = False
-            results.append(display)
+    def _apply_like_overlay(self, results, viewer_id):
+        # Likes buffered by the write-behind mode are not in the database (nor
+        # in cached pages) yet, so they are layered on top of every read.
+        if not settings.LIKES_WRITE_BEHIND or not results:
+            return results
+        deltas, states = get_like_overlay([item["id"] for item in results], viewer_id)
+        for item in results:
+            item["likes_count"] = max(item["likes_count"] + deltas.get(item["id"], 0), 0)
+            item["is_liked"] = states.get(item["id"], item["is_liked"])
         return results
 
+    def _buffer_like(self, user_id: int, answer_id: int, liked: bool):
+        stored_liked = self.question_repo.is_liked(user_id, answer_id)
+        return record_like(user_id, answer_id, liked, stored_liked) is not None
+
     async def like_answer(self, user_id: int, answer_id: int):
+        if settings.LIKES_WRITE_BEHIND and await run_in_threadpool(self._buffer_like, user_id, answer_id, True):
+            return None
         like = await run_in_threadpool(self.question_repo.like_answer, user_id, answer_id)
         
         # Notify answer author if it's not self-like
@@ -125,12 +292,15 @@ class QuestionService:
         # Actually repo has methods that return Answer object which has author relationship.
         # But like_answer returns AnswerLike object.
         
-        cache_delete_prefix(self._feed_cache_prefix())
+        # Pages only hold answer ids, so the count lives in the answer entity alone.
+        await run_in_threadpool(invalidate_answers, [answer_id])
         return like
 
     def unlike_answer(self, user_id: int, answer_id: int):
+        if settings.LIKES_WRITE_BEHIND and self._buffer_like(user_id, answer_id, False):
+            return None
         result = self.question_repo.unlike_answer(user_id, answer_id)
-        cache_delete_prefix(self._feed_cache_prefix())
+        invalidate_answers([answer_id])
         return result
 
     def get_question(self, question_id: int):
@@ -145,8 +315,12 @@ class QuestionService:
         # We could also allow asker to delete if it's not answered yet, but requirement focuses on receiver
         if question.receiver_id != user_id:
              raise ValueError("Not authorized to delete this question")
+        answer_ids = [answer.id for answer in question.answers]
         deleted = self.question_repo.delete_question(question_id)
-        cache_delete_prefix(self._questions_received_cache_prefix(user_id))
+        cache_bump_namespaces([self._questions_received_cache_namespace(user_id)])
+        if answer_ids:
+            invalidate_answers(answer_ids)
+            self._invalidate_answer_caches(user_id, answer_ids)
         return deleted
 
     def _parse_cursor(self, cursor: str):
@@ -5,7 +5,10 @@ from application.services.notification_service import NotificationService
 from domain import schemas
 from core.security import get_password_hash
 from fastapi.concurrency import run_in_threadpool
-from infrastructure.cache.redis_client import cache_delete_prefix
+from infrastructure.cache.redis_client import cache_bump_namespaces
+from infrastructure.cache.feed_timeline import drop_timeline
+from infrastructure.cache.entity_cache import invalidate_users
+from infrastructure.cache import async_redis_client
 
 class UserService:
     def __init__(self, user_repo: UserRepository, notification_service: NotificationService, block_repo: UserBlockRepository):
@@ -51,7 +54,8 @@ class UserService:
             content=f"{follower.username} te ha seguido", 
             notification_type="follow"
         )
-        cache_delete_prefix("profile:")
+        await run_in_threadpool(drop_timeline, follower_id)
+        await async_redis_client.cache_bump_namespaces([f"feed:{follower_id}"])
         
         return result
 
@@ -59,8 +63,8 @@ class UserService:
         if not self.user_repo.is_following(follower_id, followed_id):
             return # Idempotent
         result = self.user_repo.unfollow(follower_id, followed_id)
-        cache_delete_prefix("profile:")
-        cache_delete_prefix("search_users:")
+        drop_timeline(follower_id)
+        cache_bump_namespaces([f"feed:{follower_id}", "search_users"])
         return result
         return result
 
@@ -69,8 +73,8 @@ class UserService:
 
     def update_user(self, user_id: int, user_update: schemas.UserUpdate):
         updated = self.user_repo.update(user_id, user_update)
-        cache_delete_prefix("profile:")
-        cache_delete_prefix("search_users:")
+        cache_bump_namespaces(["search_users"])
+        invalidate_users([user_id])
         return updated
 
     def is_following(self, follower_id: int, followed_id: int):
@@ -80,14 +84,12 @@ class UserService:
         if blocker_id == blocked_id:
             raise ValueError("Cannot block yourself")
         result = self.block_repo.create(blocker_id, blocked_id)
-        cache_delete_prefix("profile:")
-        cache_delete_prefix("search_users:")
+        cache_bump_namespaces(["search_users"])
         return result
 
     def unblock_user(self, blocker_id: int, blocked_id: int):
         self.block_repo.delete(blocker_id, blocked_id)
-        cache_delete_prefix("profile:")
-        cache_delete_prefix("search_users:")
+        cache_bump_namespaces(["search_users"])
 
     def is_blocking(self, blocker_id: int, blocked_id: int) -> bool:
         return self.block_repo.is_blocking(blocker_id, blocked_id)
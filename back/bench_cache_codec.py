@@ -0,0 +1,100 @@
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from core.config import settings
+from domain import schemas
+from infrastructure.cache.codec import decode_value, encode_value
+
+ROUNDS = 200
+WORDS = "the a of to and in is it you that he was for on are with as his they be at one have this from or had by word but what some we can out other were all there when up use your how said an each she which do their time if will way about many then them write would like so these her long make thing see him two has look more day could go come did number sound no most people my over know water than call first who may down side been now find".split()
+_random = random.Random(0)
+
+
+def sentence(words, rng=_random):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_user(user_id):
+    return {
+        "id": user_id,
+        "username": f"user_{user_id}",
+        "email": f"user_{user_id}@example.com",
+        "bio": sentence(8, random.Random(user_id)),
+        "avatar_url": f"https://cdn.example.com/avatars/{user_id}/avatar.webp",
+        "avatar_content_type": "image/webp",
+        "avatar_size": 48213,
+        "only_followers_can_ask": False,
+        "created_at": datetime(2025, 1, 1) + timedelta(days=user_id),
+    }
+
+
+def feed_page(size=20):
+    now = datetime(2026, 1, 1)
+    return [
+        schemas.AnswerDisplay.model_validate({
+            "id": n,
+            "content": sentence(25) + " " + sentence(15),
+            "created_at": now - timedelta(minutes=n),
+            "question": {
+                "id": n,
+                "content": sentence(10),
+                "is_anonymous": False,
+                "created_at": now - timedelta(hours=n),
+                "receiver": make_user(n % 5),
+                "asker": make_user(100 + n % 7),
+            },
+            "author": make_user(n % 5),
+            "likes_count": n * 3,
+        }).model_dump()
+        for n in range(size)
+    ]
+
+
+def message_page(size=50):
+    now = datetime(2026, 1, 1)
+    return [
+        schemas.Message.model_validate({
+            "id": n,
+            "content": sentence(_random.randint(3, 15)),
+            "conversation_id": 1,
+            "sender_id": 1 + n % 2,
+            "receiver_id": 2 - n % 2,
+            "is_read": True,
+            "created_at": now - timedelta(seconds=30 * n),
+            "reactions": [{"emoji": "👍", "count": 1}] if n % 4 == 0 else [],
+        }).model_dump()
+        for n in range(size)
+    ]
+
+
+def run(name, payload, encoding, min_bytes, level):
+    settings.CACHE_ENCODING = encoding
+    settings.CACHE_COMPRESSION_MIN_BYTES = min_bytes
+    settings.CACHE_COMPRESSION_LEVEL = level
+    encoded = encode_value(payload)
+    encode_us = timeit.timeit(lambda: encode_value(payload), number=ROUNDS) / ROUNDS * 1e6
+    decode_us = timeit.timeit(lambda: decode_value(encoded), number=ROUNDS) / ROUNDS * 1e6
+    return name, len(encoded), encode_us, decode_us
+
+
+def main():
+    variants = [
+        ("json", "json", 0, 1),
+        ("json+zlib1", "json", 1, 1),
+        ("json+zlib6", "json", 1, 6),
+        ("msgpack", "msgpack", 0, 1),
+        ("msgpack+zlib1", "msgpack", 1, 1),
+    ]
+    for label, payload in (("feed page (20 answers)", feed_page()), ("message page (50 messages)", message_page())):
+        print(label)
+        print(f"  {'variant':<15}{'bytes':>8}{'saved':>8}{'encode us':>11}{'decode us':>11}")
+        baseline = None
+        for variant in variants:
+            name, size, encode_us, decode_us = run(variant[0], payload, *variant[1:])
+            baseline = baseline or size
+            print(f"  {name:<15}{size:>8}{1 - size / baseline:>8.0%}{encode_us:>11.1f}{decode_us:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
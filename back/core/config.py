@@ -30,6 +30,32 @@ class Settings(BaseSettings):
     R2_REGION: str = "auto"
 
     REDIS_URL: Optional[str] = None
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 1.0
+    REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS: float = 1.0
+    CACHE_BACKEND: str = "auto"
+    MEMORY_CACHE_MAX_ENTRIES: int = 50000
+    MEMORY_QUEUE_MAX_LENGTH: int = 10000
+    L1_CACHE_MAX_ENTRIES: int = 10000
+    L1_CACHE_TTL_SECONDS: float = 5.0
+    CACHE_ENCODING: str = "json"
+    CACHE_COMPRESSION_MIN_BYTES: int = 2048
+    CACHE_COMPRESSION_LEVEL: int = 1
+    METRICS_TOKEN: Optional[str] = None
+
+    FEED_TIMELINE_MAX_LENGTH: int = 800
+    FEED_TIMELINE_TTL_SECONDS: int = 259200
+    FEED_FANOUT_FOLLOWER_THRESHOLD: int = 10000
+
+    LIKES_WRITE_BEHIND: bool = False
+    LIKES_FLUSH_INTERVAL_SECONDS: float = 2.0
+    READ_RECEIPTS_WRITE_BEHIND: bool = False
+    READ_RECEIPTS_FLUSH_INTERVAL_SECONDS: float = 1.0
+    RECENT_MESSAGES_BUFFER_SIZE: int = 100
+    RECENT_MESSAGES_TTL_SECONDS: int = 3600
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 256
+    # What happens to a socket whose queue is full: "drop_oldest" or "disconnect".
+    WEBSOCKET_SEND_OVERFLOW: str = "drop_oldest"
 
     class Config:
         env_file = ".env"
@@ -1,5 +1,5 @@
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field, field_validator
 import re
@@ -115,6 +115,11 @@ class ConversationSummary(BaseModel):
     id: int
     other_user: User
     last_message: Optional[Message] = None
+    unread_count: int = 0
+
+class UnreadCounts(BaseModel):
+    total: int
+    conversations: Dict[int, int]
 
 class ConversationStart(BaseModel):
     username: Optional[str] = None
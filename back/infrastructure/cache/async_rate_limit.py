@@ -0,0 +1,11 @@
+from infrastructure.cache.async_redis_client import get_async_backend
+
+
+async def is_rate_limited(key: str, limit: int, window_seconds: int) -> bool:
+    backend = get_async_backend()
+    if not backend:
+        return False
+    try:
+        return await backend.incr_window(key, window_seconds) > limit
+    except Exception:
+        return False
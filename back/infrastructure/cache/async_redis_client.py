@@ -0,0 +1,70 @@
+import asyncio
+import weakref
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from core.config import settings
+from infrastructure.cache.backends import AsyncMemoryBackend, AsyncRedisBackend, cache_backend_name, get_memory_backend
+from infrastructure.cache.metrics import timed
+from infrastructure.cache.redis_client import evict_local_generations, evict_local_keys
+
+# Asyncio connections belong to the loop that opened them, so each running
+# loop gets its own pooled client.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = weakref.WeakKeyDictionary()
+
+
+def build_async_connection_pool(socket_timeout: Optional[float]) -> aioredis.ConnectionPool:
+    return aioredis.BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+        health_check_interval=30,
+    )
+
+
+def get_async_redis() -> Optional[aioredis.Redis]:
+    if not settings.REDIS_URL:
+        return None
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = aioredis.Redis(connection_pool=build_async_connection_pool(settings.REDIS_SOCKET_TIMEOUT_SECONDS))
+        _clients[loop] = client
+    return client
+
+
+def get_async_backend() -> Optional[AsyncRedisBackend | AsyncMemoryBackend]:
+    name = cache_backend_name()
+    if name == "redis":
+        client = get_async_redis()
+        return AsyncRedisBackend(client) if client else None
+    if name == "memory":
+        return AsyncMemoryBackend(get_memory_backend())
+    return None
+
+
+async def cache_delete(keys: list[str]) -> None:
+    backend = get_async_backend()
+    if not backend or not keys:
+        return
+    evict_local_keys(keys)
+    try:
+        with timed(keys[0], "delete"):
+            await backend.invalidate(keys)
+    except Exception:
+        return
+
+
+async def cache_bump_namespaces(namespaces: list[str]) -> None:
+    backend = get_async_backend()
+    if not backend or not namespaces:
+        return
+    keys = evict_local_generations(namespaces)
+    try:
+        with timed(keys[0], "bump"):
+            await backend.bump(keys)
+    except Exception:
+        return
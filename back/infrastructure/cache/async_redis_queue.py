@@ -0,0 +1,54 @@
+import asyncio
+import json
+import weakref
+from typing import Any, Optional
+
+import redis.asyncio as aioredis
+
+from core.config import settings
+from infrastructure.cache.async_redis_client import build_async_connection_pool, get_async_backend
+from infrastructure.cache.backends import AsyncRedisBackend, cache_backend_name
+
+_blocking_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = weakref.WeakKeyDictionary()
+
+
+def _get_blocking_client() -> Optional[aioredis.Redis]:
+    if not settings.REDIS_URL:
+        return None
+    loop = asyncio.get_running_loop()
+    client = _blocking_clients.get(loop)
+    if client is None:
+        client = aioredis.Redis(connection_pool=build_async_connection_pool(None))
+        _blocking_clients[loop] = client
+    return client
+
+
+def _get_consumer_backend():
+    if cache_backend_name() == "redis":
+        client = _get_blocking_client()
+        return AsyncRedisBackend(client) if client else None
+    return get_async_backend()
+
+
+async def enqueue_job(queue_name: str, payload: dict[str, Any]) -> bool:
+    backend = get_async_backend()
+    if not backend:
+        return False
+    try:
+        await backend.push(queue_name, json.dumps(payload))
+        return True
+    except Exception:
+        return False
+
+
+async def dequeue_job(queue_name: str, timeout: int = 5) -> Optional[dict[str, Any]]:
+    backend = _get_consumer_backend()
+    if not backend:
+        return None
+    try:
+        raw = await backend.pop(queue_name, timeout)
+        if raw is None:
+            return None
+        return json.loads(raw)
+    except Exception:
+        return None
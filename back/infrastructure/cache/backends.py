@@ -0,0 +1,240 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+from core.config import settings
+from infrastructure.cache.local_cache import MISSING, LocalCache
+
+DELETE_BATCH_SIZE = 500
+INVALIDATION_CHANNEL = "cache:invalidate"
+MEMORY_QUEUE_POLL_SECONDS = 0.05
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_memory_backend: Optional["MemoryBackend"] = None
+_memory_backend_lock = threading.Lock()
+
+
+def cache_backend_name() -> str:
+    # "auto" uses Redis whenever it is configured and caches nothing otherwise.
+    # The process-local backend serves stale entries behind several workers,
+    # so it has to be asked for with CACHE_BACKEND="memory".
+    if settings.CACHE_BACKEND == "auto":
+        return "redis" if settings.REDIS_URL else "none"
+    return settings.CACHE_BACKEND
+
+
+def _publish_invalidation(pipe, keys: list[str]) -> None:
+    pipe.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+
+
+# Backends store and return raw values; encoding, the L1 and error handling
+# stay in the helper modules. Redis errors propagate to those helpers.
+class RedisBackend:
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Any:
+        return self.client.get(key)
+
+    def mget(self, keys: list[str]) -> list[Any]:
+        return self.client.mget(keys)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self.client.setex(key, ttl_seconds, value)
+
+    def set_many(self, values: dict[str, Any], ttl_seconds: float) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.setex(key, ttl_seconds, value)
+        pipe.execute()
+
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        return bool(self.client.set(key, value, nx=True, px=int(ttl_seconds * 1000)))
+
+    def delete_if_equals(self, key: str, value: Any) -> bool:
+        return bool(self.client.eval(_RELEASE_LOCK_SCRIPT, 1, key, value))
+
+    def invalidate(self, keys: list[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            pipe.delete(*keys[start:start + DELETE_BATCH_SIZE])
+        _publish_invalidation(pipe, keys)
+        pipe.execute()
+
+    def bump(self, keys: list[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+        _publish_invalidation(pipe, keys)
+        pipe.execute()
+
+    def incr_window(self, key: str, window_seconds: int) -> int:
+        # The window starts with the first hit; SET NX never resets a running one.
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(key, 0, ex=window_seconds, nx=True)
+        pipe.incr(key)
+        _, count = pipe.execute()
+        return count
+
+    def push(self, queue_name: str, value: Any) -> None:
+        self.client.rpush(queue_name, value)
+
+    def pop(self, queue_name: str, timeout: int) -> Any:
+        item = self.client.blpop(queue_name, timeout=timeout)
+        return item[1] if item else None
+
+
+class AsyncRedisBackend:
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Any:
+        return await self.client.get(key)
+
+    async def mget(self, keys: list[str]) -> list[Any]:
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        await self.client.setex(key, ttl_seconds, value)
+
+    async def invalidate(self, keys: list[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            pipe.delete(*keys[start:start + DELETE_BATCH_SIZE])
+        _publish_invalidation(pipe, keys)
+        await pipe.execute()
+
+    async def bump(self, keys: list[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+        _publish_invalidation(pipe, keys)
+        await pipe.execute()
+
+    async def incr_window(self, key: str, window_seconds: int) -> int:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(key, 0, ex=window_seconds, nx=True)
+        pipe.incr(key)
+        _, count = await pipe.execute()
+        return count
+
+    async def push(self, queue_name: str, value: Any) -> None:
+        await self.client.rpush(queue_name, value)
+
+    async def pop(self, queue_name: str, timeout: int) -> Any:
+        item = await self.client.blpop(queue_name, timeout=timeout)
+        return item[1] if item else None
+
+
+# Process-local backend for single-node deployments: only this process sees
+# its entries, so it must not be used behind several workers.
+class MemoryBackend:
+    def __init__(self, max_entries: int, max_queue_length: int):
+        # Entries without a TTL (generation counters) never expire, they are
+        # only evicted with the least recently used keys.
+        self.store = LocalCache(max_entries, math.inf)
+        self.max_queue_length = max_queue_length
+        self._queues: dict[str, deque] = {}
+        self._queue_condition = threading.Condition()
+
+    def get(self, key: str) -> Any:
+        value = self.store.get(key)
+        return None if value is MISSING else value
+
+    def mget(self, keys: list[str]) -> list[Any]:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self.store.set(key, value, ttl_seconds)
+
+    def set_many(self, values: dict[str, Any], ttl_seconds: float) -> None:
+        for key, value in values.items():
+            self.store.set(key, value, ttl_seconds)
+
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        return self.store.add(key, value, ttl_seconds)
+
+    def delete_if_equals(self, key: str, value: Any) -> bool:
+        return self.store.delete_if_equals(key, value)
+
+    def invalidate(self, keys: list[str]) -> None:
+        self.store.delete(keys)
+
+    def bump(self, keys: list[str]) -> None:
+        for key in keys:
+            self.store.incr(key)
+
+    def incr_window(self, key: str, window_seconds: int) -> int:
+        self.store.add(key, 0, window_seconds)
+        return self.store.incr(key)
+
+    def push(self, queue_name: str, value: Any) -> None:
+        # Queues are bounded: with no consumer running the oldest jobs are dropped.
+        with self._queue_condition:
+            queue = self._queues.setdefault(queue_name, deque(maxlen=self.max_queue_length))
+            queue.append(value)
+            self._queue_condition.notify_all()
+
+    def pop(self, queue_name: str, timeout: Optional[float]) -> Any:
+        with self._queue_condition:
+            ready = self._queue_condition.wait_for(lambda: self._queues.get(queue_name), timeout)
+            return self._queues[queue_name].popleft() if ready else None
+
+    def clear(self) -> None:
+        self.store.clear()
+        with self._queue_condition:
+            self._queues.clear()
+
+
+class AsyncMemoryBackend:
+    def __init__(self, backend: MemoryBackend):
+        self.backend = backend
+
+    async def get(self, key: str) -> Any:
+        return self.backend.get(key)
+
+    async def mget(self, keys: list[str]) -> list[Any]:
+        return self.backend.mget(keys)
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self.backend.set(key, value, ttl_seconds)
+
+    async def invalidate(self, keys: list[str]) -> None:
+        self.backend.invalidate(keys)
+
+    async def bump(self, keys: list[str]) -> None:
+        self.backend.bump(keys)
+
+    async def incr_window(self, key: str, window_seconds: int) -> int:
+        return self.backend.incr_window(key, window_seconds)
+
+    async def push(self, queue_name: str, value: Any) -> None:
+        self.backend.push(queue_name, value)
+
+    async def pop(self, queue_name: str, timeout: int) -> Any:
+        # Poll instead of blocking the event loop on the queue condition.
+        deadline = time.monotonic() + timeout if timeout else math.inf
+        while True:
+            value = self.backend.pop(queue_name, 0)
+            if value is not None or time.monotonic() >= deadline:
+                return value
+            await asyncio.sleep(MEMORY_QUEUE_POLL_SECONDS)
+
+
+def get_memory_backend() -> MemoryBackend:
+    global _memory_backend
+    if _memory_backend is None:
+        with _memory_backend_lock:
+            if _memory_backend is None:
+                _memory_backend = MemoryBackend(settings.MEMORY_CACHE_MAX_ENTRIES, settings.MEMORY_QUEUE_MAX_LENGTH)
+    return _memory_backend
@@ -0,0 +1,70 @@
+import zlib
+from datetime import date, datetime
+from typing import Any
+
+import orjson
+
+from core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # Only needed with CACHE_ENCODING="msgpack".
+    msgpack = None
+
+# Plain uncompressed JSON is stored as is. Anything else is framed as
+# "\x00" + encoding + compression + body, which no JSON document starts with,
+# so entries written before framing existed still decode.
+FRAME_MARKER = b"\x00"
+JSON = b"j"
+MSGPACK = b"m"
+UNCOMPRESSED = b"-"
+ZLIB = b"z"
+
+
+def _msgpack_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def _frame(encoding: bytes, body: bytes) -> bytes:
+    compression = UNCOMPRESSED
+    if 0 < settings.CACHE_COMPRESSION_MIN_BYTES <= len(body):
+        compressed = zlib.compress(body, settings.CACHE_COMPRESSION_LEVEL)
+        if len(compressed) < len(body):
+            body, compression = compressed, ZLIB
+    if encoding == JSON and compression == UNCOMPRESSED:
+        return body
+    return FRAME_MARKER + encoding + compression + body
+
+
+def _unframe(raw: bytes) -> tuple[bytes, bytes]:
+    if raw[:1] != FRAME_MARKER:
+        return JSON, raw
+    encoding, compression, body = raw[1:2], raw[2:3], raw[3:]
+    if compression == ZLIB:
+        body = zlib.decompress(body)
+    return encoding, body
+
+
+def encode_value(value: Any) -> bytes:
+    if settings.CACHE_ENCODING == "msgpack" and msgpack is not None:
+        return _frame(MSGPACK, msgpack.packb(value, default=_msgpack_default))
+    # orjson serializes datetimes natively.
+    return _frame(JSON, orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS))
+
+
+def decode_value(raw: bytes) -> Any:
+    encoding, body = _unframe(raw)
+    if encoding == MSGPACK:
+        return msgpack.unpackb(body)
+    return orjson.loads(body)
+
+
+def encode_body(body: bytes) -> bytes:
+    # Rendered response bodies are already JSON; they are only compressed.
+    return _frame(JSON, body)
+
+
+def decode_body(raw: bytes) -> bytes:
+    return _unframe(raw)[1]
@@ -0,0 +1,64 @@
+from typing import Any, Callable
+
+from domain import schemas
+from infrastructure.cache.redis_client import cache_delete, cache_get_many_json, cache_set_many_json
+
+USER_TTL_SECONDS = 300
+ANSWER_TTL_SECONDS = 300
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def answer_key(answer_id: int) -> str:
+    return f"answer:{answer_id}"
+
+
+def user_entity(user) -> dict:
+    return schemas.User.model_validate(user).model_dump(mode="json")
+
+
+def answer_entity(answer) -> dict:
+    # Users are referenced by id only and hydrated from their own entries.
+    return {
+        **schemas.Answer.model_validate(answer).model_dump(mode="json"),
+        "like_count": answer.like_count or 0,
+        "question": schemas.Question.model_validate(answer.question).model_dump(mode="json"),
+    }
+
+
+def _get_entities(key: Callable[[int], str], ids: list[int], load: Callable[[list[int]], dict[int, Any]], ttl_seconds: int) -> dict[int, Any]:
+    # One multi-get for the whole set; whatever is missing is loaded in one
+    # batch and written back. Ids that no longer exist are simply absent.
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return {}
+    cached = cache_get_many_json([key(entity_id) for entity_id in ids])
+    entities = {entity_id: value for entity_id, value in zip(ids, cached) if value is not None}
+    missing = [entity_id for entity_id in ids if entity_id not in entities]
+    if missing:
+        loaded = load(missing)
+        cache_set_many_json({key(entity_id): value for entity_id, value in loaded.items()}, ttl_seconds)
+        entities.update(loaded)
+    return entities
+
+
+def get_users(user_ids: list[int], load: Callable[[list[int]], dict[int, Any]]) -> dict[int, Any]:
+    return _get_entities(user_key, user_ids, load, USER_TTL_SECONDS)
+
+
+def get_answers(answer_ids: list[int], load: Callable[[list[int]], dict[int, Any]]) -> dict[int, Any]:
+    return _get_entities(answer_key, answer_ids, load, ANSWER_TTL_SECONDS)
+
+
+def store_answers(answers) -> None:
+    cache_set_many_json({answer_key(answer.id): answer_entity(answer) for answer in answers}, ANSWER_TTL_SECONDS)
+
+
+def invalidate_users(user_ids: list[int]) -> None:
+    cache_delete([user_key(user_id) for user_id in user_ids])
+
+
+def invalidate_answers(answer_ids: list[int]) -> None:
+    cache_delete([answer_key(answer_id) for answer_id in answer_ids])
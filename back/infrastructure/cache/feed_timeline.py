@@ -0,0 +1,178 @@
+from typing import Optional
+
+from core.config import settings
+from infrastructure.cache.redis_client import get_redis
+
+FANOUT_BATCH_SIZE = 500
+PULL_AUTHORS_KEY = "timeline:pull_authors"
+
+# Only append to timelines that are already materialized, otherwise a cold
+# follower would end up with a partial timeline holding a single answer.
+# Trimming the tail marks the timeline as no longer holding the whole feed.
+_PUSH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+    if redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[3]) + 1)) > 0 then
+        redis.call('SET', KEYS[2], 1)
+    end
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+    return 1
+end
+return 0
+"""
+
+
+def timeline_key(user_id: int) -> str:
+    return f"timeline:{user_id}"
+
+
+def trimmed_key(user_id: int) -> str:
+    # Present while older answers exist beyond the timeline's tail. Kept apart
+    # from the size, which deletions shrink below the maximum.
+    return f"timeline:{user_id}:trimmed"
+
+
+def _member(answer_id: int) -> str:
+    # Zero padded so answers sharing a timestamp sort by id, like the SQL feed.
+    return f"{answer_id:012d}"
+
+
+def _to_entries(rows) -> list[tuple[int, float]]:
+    return [(int(member), float(score)) for member, score in rows]
+
+
+def push_to_timelines(follower_ids: list[int], answer_id: int, score: float) -> None:
+    client = get_redis()
+    if not client or not follower_ids:
+        return
+    try:
+        script = client.register_script(_PUSH_SCRIPT)
+        for start in range(0, len(follower_ids), FANOUT_BATCH_SIZE):
+            pipe = client.pipeline(transaction=False)
+            for follower_id in follower_ids[start:start + FANOUT_BATCH_SIZE]:
+                script(
+                    keys=[timeline_key(follower_id), trimmed_key(follower_id)],
+                    args=[score, _member(answer_id), settings.FEED_TIMELINE_MAX_LENGTH, settings.FEED_TIMELINE_TTL_SECONDS],
+                    client=pipe
+                )
+            pipe.execute()
+    except Exception:
+        return
+
+
+def remove_from_timelines(follower_ids: list[int], answer_ids: list[int]) -> None:
+    client = get_redis()
+    if not client or not follower_ids or not answer_ids:
+        return
+    members = [_member(answer_id) for answer_id in answer_ids]
+    try:
+        for start in range(0, len(follower_ids), FANOUT_BATCH_SIZE):
+            pipe = client.pipeline(transaction=False)
+            for follower_id in follower_ids[start:start + FANOUT_BATCH_SIZE]:
+                pipe.zrem(timeline_key(follower_id), *members)
+            pipe.execute()
+    except Exception:
+        return
+
+
+def read_timeline(user_id: int, skip: int, limit: int) -> Optional[tuple[list[tuple[int, float]], bool]]:
+    # Returns the window and whether the timeline was trimmed, or None when
+    # there is no timeline.
+    client = get_redis()
+    if not client:
+        return None
+    key = timeline_key(user_id)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.zcard(key)
+        pipe.zrevrange(key, skip, skip + limit - 1, withscores=True)
+        pipe.exists(trimmed_key(user_id))
+        size, rows, trimmed = pipe.execute()
+        if not size:
+            return None
+        return _to_entries(rows), bool(trimmed)
+    except Exception:
+        return None
+
+
+def read_timeline_before(user_id: int, before_score: float, before_id: int, limit: int) -> Optional[tuple[list[tuple[int, float]], bool]]:
+    client = get_redis()
+    if not client:
+        return None
+    key = timeline_key(user_id)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.zcard(key)
+        pipe.zcount(key, before_score, before_score)
+        pipe.exists(trimmed_key(user_id))
+        size, ties, trimmed = pipe.execute()
+        if not size:
+            return None
+        rows = client.zrevrangebyscore(key, before_score, "-inf", start=0, num=limit + ties, withscores=True)
+        entries = [
+            (answer_id, score) for answer_id, score in _to_entries(rows)
+            if score < before_score or answer_id < before_id
+        ]
+        return entries[:limit], bool(trimmed)
+    except Exception:
+        return None
+
+
+def rebuild_timeline(user_id: int, entries: list[tuple[int, float]], trimmed: bool) -> bool:
+    client = get_redis()
+    if not client:
+        return False
+    key = timeline_key(user_id)
+    try:
+        pipe = client.pipeline(transaction=True)
+        pipe.delete(key, trimmed_key(user_id))
+        if entries:
+            pipe.zadd(key, {_member(answer_id): score for answer_id, score in entries})
+            pipe.expire(key, settings.FEED_TIMELINE_TTL_SECONDS)
+            if trimmed:
+                pipe.set(trimmed_key(user_id), 1, ex=settings.FEED_TIMELINE_TTL_SECONDS)
+        pipe.execute()
+        return True
+    except Exception:
+        return False
+
+
+def drop_timeline(user_id: int) -> None:
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.delete(timeline_key(user_id), trimmed_key(user_id))
+    except Exception:
+        return
+
+
+def get_pull_authors() -> Optional[list[int]]:
+    client = get_redis()
+    if not client:
+        return None
+    try:
+        return [int(member) for member in client.smembers(PULL_AUTHORS_KEY)]
+    except Exception:
+        return None
+
+
+def mark_pull_author(author_id: int) -> None:
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.sadd(PULL_AUTHORS_KEY, author_id)
+    except Exception:
+        return
+
+
+def is_pull_author(author_id: int) -> bool:
+    client = get_redis()
+    if not client:
+        return False
+    try:
+        return bool(client.sismember(PULL_AUTHORS_KEY, author_id))
+    except Exception:
+        return False
@@ -0,0 +1,117 @@
+from typing import Optional
+
+from infrastructure.cache.redis_client import get_redis
+
+PENDING_KEY = "likes:pending"
+DELTA_KEY = "likes:delta"
+FLUSHING_PENDING_KEY = "likes:pending:flushing"
+FLUSHING_DELTA_KEY = "likes:delta:flushing"
+
+# Records the latest like state of a (answer, user) pair and moves the answer
+# counter only when the effective state changes. The stored state is the one
+# in the database and only applies when nothing is buffered for the pair.
+_RECORD_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if not current then
+    current = redis.call('HGET', KEYS[3], ARGV[1])
+end
+if not current then
+    current = ARGV[3]
+end
+if current == ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+if ARGV[2] == '1' then
+    redis.call('HINCRBY', KEYS[2], ARGV[4], 1)
+else
+    redis.call('HINCRBY', KEYS[2], ARGV[4], -1)
+end
+return 1
+"""
+
+# Moves the pending toggles aside so new likes keep buffering while they are
+# written to the database. A batch left behind by a crashed flush is retried first.
+_TAKE_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[3])
+    if redis.call('EXISTS', KEYS[2]) == 1 then
+        redis.call('RENAME', KEYS[2], KEYS[4])
+    end
+end
+return redis.call('HGETALL', KEYS[3])
+"""
+
+
+def _field(answer_id: int, user_id: int) -> str:
+    return f"{answer_id}:{user_id}"
+
+
+def record_like(user_id: int, answer_id: int, liked: bool, stored_liked: bool) -> Optional[bool]:
+    client = get_redis()
+    if not client:
+        return None
+    try:
+        script = client.register_script(_RECORD_SCRIPT)
+        changed = script(
+            keys=[PENDING_KEY, DELTA_KEY, FLUSHING_PENDING_KEY],
+            args=[_field(answer_id, user_id), int(liked), int(stored_liked), answer_id]
+        )
+        return bool(changed)
+    except Exception:
+        return None
+
+
+def get_like_overlay(answer_ids: list[int], viewer_id: int | None) -> tuple[dict[int, int], dict[int, bool]]:
+    client = get_redis()
+    if not client or not answer_ids:
+        return {}, {}
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.hmget(DELTA_KEY, answer_ids)
+        pipe.hmget(FLUSHING_DELTA_KEY, answer_ids)
+        if viewer_id:
+            fields = [_field(answer_id, viewer_id) for answer_id in answer_ids]
+            pipe.hmget(PENDING_KEY, fields)
+            pipe.hmget(FLUSHING_PENDING_KEY, fields)
+        replies = pipe.execute()
+    except Exception:
+        return {}, {}
+    deltas = {}
+    for answer_id, delta, flushing_delta in zip(answer_ids, replies[0], replies[1]):
+        total = int(delta or 0) + int(flushing_delta or 0)
+        if total:
+            deltas[answer_id] = total
+    states = {}
+    if viewer_id:
+        for answer_id, pending, flushing in zip(answer_ids, replies[2], replies[3]):
+            state = pending if pending is not None else flushing
+            if state is not None:
+                states[answer_id] = int(state) == 1
+    return deltas, states
+
+
+def take_pending_likes() -> list[tuple[int, int, bool]]:
+    client = get_redis()
+    if not client:
+        return []
+    try:
+        script = client.register_script(_TAKE_SCRIPT)
+        raw = script(keys=[PENDING_KEY, DELTA_KEY, FLUSHING_PENDING_KEY, FLUSHING_DELTA_KEY])
+    except Exception:
+        return []
+    states = []
+    for field, state in zip(raw[::2], raw[1::2]):
+        answer_id, user_id = field.decode().split(":", 1)
+        states.append((int(answer_id), int(user_id), int(state) == 1))
+    return states
+
+
+def finish_likes_flush() -> None:
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.delete(FLUSHING_PENDING_KEY, FLUSHING_DELTA_KEY)
+    except Exception:
+        return
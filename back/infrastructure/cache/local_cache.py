@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from core.config import settings
+
+MISSING = object()
+
+
+# Bounded per-process LRU with per-entry expiry. As the L1 in front of Redis,
+# entries expire after ttl_seconds so a lost invalidation message can only
+# serve stale data for that long; values are shared between callers, never
+# mutate them. It also backs the process-local cache backend.
+class LocalCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Any:
+        if self.max_entries <= 0:
+            return MISSING
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._set(key, value, time.monotonic() + ttl)
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        if self.max_entries <= 0:
+            return False
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if self._get(key) is not MISSING:
+                return False
+            self._set(key, value, time.monotonic() + ttl)
+            return True
+
+    def incr(self, key: str) -> int:
+        # Like INCR, a missing counter starts at zero and a running one keeps its expiry.
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._get(key) is MISSING:
+                entry = (time.monotonic() + self.ttl_seconds, 0)
+            expires_at, value = entry
+            value = int(value) + 1
+            self._set(key, value, expires_at)
+            return value
+
+    def delete(self, keys: list[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def delete_if_equals(self, key: str, value: Any) -> bool:
+        with self._lock:
+            if self._get(key) != value:
+                return False
+            del self._entries[key]
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalCache(settings.L1_CACHE_MAX_ENTRIES, settings.L1_CACHE_TTL_SECONDS)
@@ -0,0 +1,97 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+COUNTERS = ("hits", "l1_hits", "misses", "sets", "invalidations", "errors", "bytes_read", "bytes_written")
+
+
+def key_family(key: str) -> str:
+    # "feed:12:v3:0:10:" -> "feed"; generation counters and single-flight
+    # locks are reported under their own families.
+    return key.split(":", 1)[0]
+
+
+# Per-process counters and latency histograms, keyed by key family.
+class CacheMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: defaultdict[tuple[str, str], int] = defaultdict(int)
+        self._histograms: dict[tuple[str, str], list] = {}
+
+    def incr(self, key: str, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[(key_family(key), name)] += amount
+
+    def observe(self, key: str, operation: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get((key_family(key), operation))
+            if histogram is None:
+                # One count per bucket plus +Inf, then the running sum.
+                histogram = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+                self._histograms[(key_family(key), operation)] = histogram
+            histogram[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            histogram[-1] += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            families: dict[str, dict] = {}
+            for (family, name), value in self._counters.items():
+                families.setdefault(family, {"latency": {}})[name] = value
+            for (family, operation), histogram in self._histograms.items():
+                counts = histogram[:-1]
+                families.setdefault(family, {"latency": {}})["latency"][operation] = {
+                    "count": sum(counts),
+                    "sum_seconds": histogram[-1],
+                    "buckets": {str(bound): count for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), counts)},
+                }
+        for family in families.values():
+            for name in COUNTERS:
+                family.setdefault(name, 0)
+            lookups = family["hits"] + family["misses"]
+            family["hit_ratio"] = family["hits"] / lookups if lookups else None
+        return families
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(value)) for key, value in self._histograms.items())
+        lines = []
+        for name in COUNTERS:
+            lines.append(f"# TYPE cache_{name}_total counter")
+            for (family, counter), value in counters:
+                if counter == name:
+                    lines.append(f'cache_{name}_total{{family="{family}"}} {value}')
+        lines.append("# TYPE cache_operation_seconds histogram")
+        for (family, operation), histogram in histograms:
+            labels = f'family="{family}",operation="{operation}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram[:-1]):
+                cumulative += count
+                lines.append(f'cache_operation_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"cache_operation_seconds_sum{{{labels}}} {histogram[-1]}")
+            lines.append(f"cache_operation_seconds_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+cache_metrics = CacheMetrics()
+
+
+@contextmanager
+def timed(key: str, operation: str):
+    # Errors are counted here; the caller still decides how to degrade.
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        cache_metrics.incr(key, "errors")
+        raise
+    finally:
+        cache_metrics.observe(key, operation, time.perf_counter() - started)
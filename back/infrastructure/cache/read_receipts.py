@@ -0,0 +1,67 @@
+from typing import Optional
+
+from infrastructure.cache.redis_client import get_redis
+
+PENDING_KEY = "read_receipts:pending"
+FLUSHING_PENDING_KEY = "read_receipts:pending:flushing"
+
+# Keeps the highest message id read per (conversation, user) pair, so any
+# number of page fetches between two flushes collapse into one write.
+_RECORD_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if current and tonumber(current) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+return 1
+"""
+
+# Same hand-over as the like buffer: pending receipts are moved aside while
+# they are written, and a batch left behind by a crashed flush is retried first.
+_TAKE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+
+def _field(conversation_id: int, user_id: int) -> str:
+    return f"{conversation_id}:{user_id}"
+
+
+def record_read(conversation_id: int, user_id: int, message_id: int) -> Optional[bool]:
+    client = get_redis()
+    if not client:
+        return None
+    try:
+        script = client.register_script(_RECORD_SCRIPT)
+        return bool(script(keys=[PENDING_KEY], args=[_field(conversation_id, user_id), message_id]))
+    except Exception:
+        return None
+
+
+def take_pending_reads() -> list[tuple[int, int, int]]:
+    client = get_redis()
+    if not client:
+        return []
+    try:
+        script = client.register_script(_TAKE_SCRIPT)
+        raw = script(keys=[PENDING_KEY, FLUSHING_PENDING_KEY])
+    except Exception:
+        return []
+    receipts = []
+    for field, message_id in zip(raw[::2], raw[1::2]):
+        conversation_id, user_id = field.decode().split(":", 1)
+        receipts.append((int(conversation_id), int(user_id), int(message_id)))
+    return receipts
+
+
+def finish_reads_flush() -> None:
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.delete(FLUSHING_PENDING_KEY)
+    except Exception:
+        return
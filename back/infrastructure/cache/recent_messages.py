@@ -0,0 +1,183 @@
+from typing import Optional
+
+import orjson
+
+from core.config import settings
+from infrastructure.cache.redis_client import get_redis
+
+COMPLETE_FIELD = "complete"
+
+# The buffer is a hash of message id -> rendered message holding the newest
+# messages of a conversation, plus a flag telling whether that is all of them.
+# Only buffers that already exist are appended to, so a missing one is never
+# mistaken for a conversation with a single message.
+_APPEND_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+local ids = {}
+for _, field in ipairs(redis.call('HKEYS', KEYS[1])) do
+    if field ~= 'complete' then
+        table.insert(ids, tonumber(field))
+    end
+end
+local max_length = tonumber(ARGV[3])
+if #ids > max_length then
+    table.sort(ids)
+    for i = 1, #ids - max_length do
+        redis.call('HDEL', KEYS[1], string.format('%d', ids[i]))
+    end
+    redis.call('HSET', KEYS[1], 'complete', '0')
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+_PATCH_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+
+def recent_messages_key(conversation_id: int) -> str:
+    return f"recent_messages:{conversation_id}"
+
+
+def recent_messages_enabled() -> bool:
+    return get_redis() is not None
+
+
+def read_recent_message_ids(conversation_id: int) -> Optional[tuple[list[int], bool]]:
+    # Returns the buffered message ids oldest first and whether they are the
+    # whole conversation, or None when there is no buffer. Values are fetched
+    # separately, once a page is known to fall inside the buffer.
+    client = get_redis()
+    if not client:
+        return None
+    key = recent_messages_key(conversation_id)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.hkeys(key)
+        pipe.hget(key, COMPLETE_FIELD)
+        fields, complete = pipe.execute()
+    except Exception:
+        return None
+    if not fields:
+        return None
+    complete_field = COMPLETE_FIELD.encode()
+    return sorted(int(field) for field in fields if field != complete_field), complete == b"1"
+
+
+def read_recent_message_values(conversation_id: int, message_ids: list[int]) -> Optional[list[bytes]]:
+    # None when any of them is gone since the ids were read.
+    if not message_ids:
+        return []
+    client = get_redis()
+    if not client:
+        return None
+    try:
+        values = client.hmget(recent_messages_key(conversation_id), message_ids)
+    except Exception:
+        return None
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+def store_recent_messages(conversation_id: int, messages: list[tuple[int, bytes]], complete: bool) -> None:
+    client = get_redis()
+    if not client:
+        return
+    key = recent_messages_key(conversation_id)
+    try:
+        pipe = client.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping={COMPLETE_FIELD: int(complete), **{str(message_id): value for message_id, value in messages}})
+        pipe.expire(key, settings.RECENT_MESSAGES_TTL_SECONDS)
+        pipe.execute()
+    except Exception:
+        return
+
+
+def append_recent_message(conversation_id: int, message_id: int, value: bytes) -> None:
+    client = get_redis()
+    if not client:
+        return
+    try:
+        script = client.register_script(_APPEND_SCRIPT)
+        script(
+            keys=[recent_messages_key(conversation_id)],
+            args=[message_id, value, settings.RECENT_MESSAGES_BUFFER_SIZE, settings.RECENT_MESSAGES_TTL_SECONDS]
+        )
+    except Exception:
+        return
+
+
+def patch_recent_message(conversation_id: int, message_id: int, value: bytes) -> None:
+    client = get_redis()
+    if not client:
+        return
+    try:
+        script = client.register_script(_PATCH_SCRIPT)
+        script(keys=[recent_messages_key(conversation_id)], args=[message_id, value])
+    except Exception:
+        return
+
+
+def mark_recent_messages_read(conversation_id: int, receiver_id: int, up_to_message_id: int) -> None:
+    client = get_redis()
+    if not client:
+        return
+    key = recent_messages_key(conversation_id)
+    complete_field = COMPLETE_FIELD.encode()
+
+    # The affected messages are decoded and re-rendered rather than edited in
+    # place; WATCH retries the patch if one of them changes in between.
+    def mark_read(pipe):
+        message_ids = [
+            int(field) for field in pipe.hkeys(key)
+            if field != complete_field and int(field) <= up_to_message_id
+        ]
+        values = pipe.hmget(key, message_ids) if message_ids else []
+        updates = {}
+        for message_id, value in zip(message_ids, values):
+            if value is None:
+                continue
+            message = orjson.loads(value)
+            if message["receiver_id"] == receiver_id and not message["is_read"]:
+                message["is_read"] = True
+                updates[str(message_id)] = orjson.dumps(message)
+        pipe.multi()
+        if updates:
+            pipe.hset(key, mapping=updates)
+
+    try:
+        client.transaction(mark_read, key)
+    except Exception:
+        return
+
+
+def remove_recent_message(conversation_id: int, message_id: int) -> None:
+    # The remaining messages are still the newest ones that exist, so the
+    # buffer stays valid without a refill.
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.hdel(recent_messages_key(conversation_id), message_id)
+    except Exception:
+        return
+
+
+def drop_recent_messages(conversation_id: int) -> None:
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.delete(recent_messages_key(conversation_id))
+    except Exception:
+        return
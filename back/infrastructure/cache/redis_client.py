@@ -1,57 +1,355 @@
 import json
-from typing import Any, Optional
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional
 
+import orjson
 import redis
 
 from core.config import settings
+from infrastructure.cache.backends import INVALIDATION_CHANNEL, MemoryBackend, RedisBackend, cache_backend_name, get_memory_backend
+from infrastructure.cache.codec import decode_body, decode_value, encode_body, encode_value
+from infrastructure.cache.local_cache import MISSING, local_cache
+from infrastructure.cache.metrics import cache_metrics, timed
+
+RECOMPUTE_LOCK_TTL_SECONDS = 5.0
+RECOMPUTE_WAIT_SECONDS = 2.0
+RECOMPUTE_POLL_SECONDS = 0.05
+EARLY_EXPIRATION_BETA = 1.0
+
+_client: Optional[redis.Redis] = None
+_client_lock = threading.Lock()
+
+
+def build_connection_pool(socket_timeout: Optional[float]) -> redis.ConnectionPool:
+    # Responses stay as bytes: JSON decoding accepts them directly and cached
+    # payloads are not always text.
+    return redis.BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+        health_check_interval=30,
+    )
 
 
 def get_redis() -> Optional[redis.Redis]:
+    global _client
     if not settings.REDIS_URL:
         return None
-    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis(connection_pool=build_connection_pool(settings.REDIS_SOCKET_TIMEOUT_SECONDS))
+                _start_invalidation_listener()
+    return _client
+
+
+def get_backend() -> Optional[RedisBackend | MemoryBackend]:
+    name = cache_backend_name()
+    if name == "redis":
+        client = get_redis()
+        return RedisBackend(client) if client else None
+    if name == "memory":
+        return get_memory_backend()
+    return None
+
+
+def _start_invalidation_listener() -> None:
+    if settings.L1_CACHE_MAX_ENTRIES <= 0:
+        return
+    thread = threading.Thread(target=_listen_for_invalidations, name="cache-invalidation", daemon=True)
+    thread.start()
+
+
+def _listen_for_invalidations() -> None:
+    # Other workers publish the keys they deleted or bumped; drop our L1 copies.
+    client = redis.Redis(connection_pool=build_connection_pool(None))
+    while True:
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Anything published while we were disconnected was missed.
+            local_cache.clear()
+            for message in pubsub.listen():
+                local_cache.delete(json.loads(message["data"]))
+        except Exception:
+            time.sleep(1)
+
+
+def encode_models(items: list[Any]) -> bytes:
+    # Same JSON as FastAPI's response_model rendering, in one encoder pass.
+    return orjson.dumps([item.model_dump(mode="json") for item in items])
 
 
 def cache_get_json(key: str) -> Any:
-    client = get_redis()
-    if not client:
+    backend = get_backend()
+    if not backend:
         return None
+    value = local_cache.get(key)
+    if value is not MISSING:
+        cache_metrics.incr(key, "hits")
+        cache_metrics.incr(key, "l1_hits")
+        return value
     try:
-        raw = client.get(key)
-        if raw is None:
-            return None
-        return json.loads(raw)
+        with timed(key, "get"):
+            raw = backend.get(key)
+            if raw is None:
+                cache_metrics.incr(key, "misses")
+                return None
+            value = decode_value(raw)
     except Exception:
         return None
+    cache_metrics.incr(key, "hits")
+    cache_metrics.incr(key, "bytes_read", len(raw))
+    local_cache.set(key, value)
+    return value
+
+
+def cache_get_many_json(keys: list[str]) -> list[Any]:
+    backend = get_backend()
+    if not backend or not keys:
+        return [None] * len(keys)
+    results = [local_cache.get(key) for key in keys]
+    missing = [key for key, value in zip(keys, results) if value is MISSING]
+    for key, value in zip(keys, results):
+        if value is not MISSING:
+            cache_metrics.incr(key, "hits")
+            cache_metrics.incr(key, "l1_hits")
+    if not missing:
+        return results
+    try:
+        with timed(missing[0], "mget"):
+            values = backend.mget(missing)
+    except Exception:
+        values = [None] * len(missing)
+    fetched = {}
+    for key, raw in zip(missing, values):
+        try:
+            fetched[key] = decode_value(raw) if raw is not None else None
+        except Exception:
+            cache_metrics.incr(key, "errors")
+            fetched[key] = None
+        if fetched[key] is None:
+            cache_metrics.incr(key, "misses")
+        else:
+            cache_metrics.incr(key, "hits")
+            cache_metrics.incr(key, "bytes_read", len(raw))
+            local_cache.set(key, fetched[key])
+    return [fetched[key] if value is MISSING else value for key, value in zip(keys, results)]
 
 
 def cache_set_json(key: str, value: Any, ttl_seconds: int) -> None:
-    client = get_redis()
-    if not client:
+    backend = get_backend()
+    if not backend:
         return
     try:
-        client.setex(key, ttl_seconds, json.dumps(value))
+        with timed(key, "set"):
+            payload = encode_value(value)
+            backend.set(key, payload, ttl_seconds)
     except Exception:
         return
+    cache_metrics.incr(key, "sets")
+    cache_metrics.incr(key, "bytes_written", len(payload))
+
+
+def cache_set_many_json(values: dict[str, Any], ttl_seconds: int) -> None:
+    backend = get_backend()
+    if not backend or not values:
+        return
+    try:
+        with timed(next(iter(values)), "mset"):
+            payloads = {key: encode_value(value) for key, value in values.items()}
+            backend.set_many(payloads, ttl_seconds)
+    except Exception:
+        return
+    for key, payload in payloads.items():
+        cache_metrics.incr(key, "sets")
+        cache_metrics.incr(key, "bytes_written", len(payload))
+
+
+def evict_local_keys(keys: list[str]) -> None:
+    # The L1 side of a delete, shared with the asyncio client.
+    local_cache.delete(keys)
+    for key in keys:
+        cache_metrics.incr(key, "invalidations")
 
 
 def cache_delete(keys: list[str]) -> None:
-    client = get_redis()
-    if not client or not keys:
+    backend = get_backend()
+    if not backend or not keys:
         return
+    evict_local_keys(keys)
     try:
-        client.delete(*keys)
+        with timed(keys[0], "delete"):
+            backend.invalidate(keys)
     except Exception:
         return
 
 
-def cache_delete_prefix(prefix: str) -> None:
-    client = get_redis()
-    if not client:
+def generation_key(namespace: str) -> str:
+    return f"gen:{namespace}"
+
+
+def versioned_namespace(namespace: str, generation: Any) -> str:
+    return f"{namespace}:v{int(generation or 0)}"
+
+
+def evict_local_generations(namespaces: list[str]) -> list[str]:
+    # The L1 side of a bump, shared with the asyncio client; returns the
+    # generation keys to bump in the backend.
+    keys = [generation_key(namespace) for namespace in namespaces]
+    local_cache.delete(keys)
+    # Counted against the namespace's own family: a bump invalidates its pages.
+    for namespace in namespaces:
+        cache_metrics.incr(namespace, "invalidations")
+    return keys
+
+
+def cache_namespace(namespace: str) -> str:
+    return cache_namespaces([namespace])[0]
+
+
+def cache_namespaces(namespaces: list[str]) -> list[str]:
+    # Keys are built under the namespace's current generation; bumping the
+    # generation orphans every older key, which then ages out through its TTL.
+    # Generations are read through L1 too; bumps are broadcast like deletes.
+    backend = get_backend()
+    keys = [generation_key(namespace) for namespace in namespaces]
+    generations = [local_cache.get(key) for key in keys]
+    missing = [key for key, generation in zip(keys, generations) if generation is MISSING]
+    for key, generation in zip(keys, generations):
+        if generation is not MISSING:
+            cache_metrics.incr(key, "hits")
+            cache_metrics.incr(key, "l1_hits")
+    if backend and missing:
+        try:
+            with timed(missing[0], "mget"):
+                fetched = dict(zip(missing, backend.mget(missing)))
+        except Exception:
+            fetched = {}
+        for key in missing:
+            cache_metrics.incr(key, "hits" if fetched.get(key) is not None else "misses")
+        for key in missing:
+            if key in fetched:
+                local_cache.set(key, fetched[key])
+        generations = [fetched.get(key) if generation is MISSING else generation for key, generation in zip(keys, generations)]
+    return [versioned_namespace(namespace, None if generation is MISSING else generation) for namespace, generation in zip(namespaces, generations)]
+
+
+def cache_bump_namespaces(namespaces: list[str]) -> None:
+    backend = get_backend()
+    if not backend or not namespaces:
         return
+    keys = evict_local_generations(namespaces)
     try:
-        keys = list(client.scan_iter(match=f"{prefix}*"))
-        if keys:
-            client.delete(*keys)
+        with timed(keys[0], "bump"):
+            backend.bump(keys)
     except Exception:
         return
+
+
+def _is_fresh(expires_at: float, delta: float) -> bool:
+    # Probabilistic early expiration: the closer the entry is to expiring and
+    # the slower it was to compute, the likelier one reader refreshes it early.
+    early = delta * EARLY_EXPIRATION_BETA * -math.log(1.0 - random.random())
+    return time.time() + early < expires_at
+
+
+def _read_entry(backend, key: str, decode: Callable[[bytes], Any], use_local: bool = True) -> Optional[tuple[float, float, Any]]:
+    # Entries are "<expires_at> <delta>\n<payload>" so the payload can be
+    # handed out without another decode pass.
+    if use_local:
+        entry = local_cache.get(key)
+        if entry is not MISSING:
+            cache_metrics.incr(key, "l1_hits")
+            return entry
+    try:
+        with timed(key, "get"):
+            raw = backend.get(key)
+            if raw is None:
+                return None
+            header, payload = raw.split(b"\n", 1)
+            expires_at, delta = (float(part) for part in header.split())
+            entry = (expires_at, delta, decode(payload))
+    except Exception:
+        return None
+    cache_metrics.incr(key, "bytes_read", len(raw))
+    local_cache.set(key, entry)
+    return entry
+
+
+def _wait_for_entry(backend, key: str, decode: Callable[[bytes], Any]) -> Optional[tuple[float, float, Any]]:
+    deadline = time.monotonic() + RECOMPUTE_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(RECOMPUTE_POLL_SECONDS)
+        entry = _read_entry(backend, key, decode, use_local=False)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _get_or_set(key: str, ttl_seconds: int, compute: Callable[[], Any], encode: Callable[[Any], bytes], decode: Callable[[bytes], Any]) -> Any:
+    # Single-flight read-through: one caller per key recomputes under a short
+    # Redis lock, the others keep serving the current entry or wait for the
+    # new one.
+    backend = get_backend()
+    if not backend:
+        return compute()
+    entry = _read_entry(backend, key, decode)
+    if entry is not None:
+        expires_at, delta, value = entry
+        if expires_at <= time.time():
+            entry = None
+        elif _is_fresh(expires_at, delta):
+            cache_metrics.incr(key, "hits")
+            return value
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+    try:
+        acquired = backend.add(lock_key, token, RECOMPUTE_LOCK_TTL_SECONDS)
+    except Exception:
+        acquired = False
+    if not acquired:
+        if entry is not None:
+            cache_metrics.incr(key, "hits")
+            return entry[2]
+        entry = _wait_for_entry(backend, key, decode)
+        if entry is not None:
+            cache_metrics.incr(key, "hits")
+            return entry[2]
+    cache_metrics.incr(key, "misses")
+    try:
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+        header = f"{time.time() + ttl_seconds:.3f} {delta:.6f}\n".encode()
+        local_cache.delete([key])
+        try:
+            with timed(key, "set"):
+                payload = header + encode(value)
+                backend.set(key, payload, ttl_seconds)
+            cache_metrics.incr(key, "sets")
+            cache_metrics.incr(key, "bytes_written", len(payload))
+        except Exception:
+            pass
+        return value
+    finally:
+        if acquired:
+            try:
+                backend.delete_if_equals(lock_key, token)
+            except Exception:
+                pass
+
+
+def cache_get_or_set_json(key: str, ttl_seconds: int, compute: Callable[[], Any]) -> Any:
+    # compute() must return a JSON serializable value.
+    return _get_or_set(key, ttl_seconds, compute, encode_value, decode_value)
+
+
+def cache_get_or_set_bytes(key: str, ttl_seconds: int, compute: Callable[[], bytes]) -> bytes:
+    return _get_or_set(key, ttl_seconds, compute, encode_body, decode_body)
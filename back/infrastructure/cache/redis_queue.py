@@ -1,37 +1,56 @@
 import json
+import threading
 from typing import Any, Optional
 
 import redis
 
 from core.config import settings
+from infrastructure.cache.backends import RedisBackend, cache_backend_name
+from infrastructure.cache.redis_client import build_connection_pool, get_backend
 
+_blocking_client: Optional[redis.Redis] = None
+_blocking_client_lock = threading.Lock()
 
-def _get_client() -> Optional[redis.Redis]:
+
+def _get_blocking_client() -> Optional[redis.Redis]:
+    # BLPOP waits longer than the socket timeout used for cache lookups, so
+    # consumers get their own pool without one.
+    global _blocking_client
     if not settings.REDIS_URL:
         return None
-    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    if _blocking_client is None:
+        with _blocking_client_lock:
+            if _blocking_client is None:
+                _blocking_client = redis.Redis(connection_pool=build_connection_pool(None))
+    return _blocking_client
+
+
+def _get_consumer_backend():
+    if cache_backend_name() == "redis":
+        client = _get_blocking_client()
+        return RedisBackend(client) if client else None
+    return get_backend()
 
 
 def enqueue_job(queue_name: str, payload: dict[str, Any]) -> bool:
-    client = _get_client()
-    if not client:
+    backend = get_backend()
+    if not backend:
         return False
     try:
-        client.rpush(queue_name, json.dumps(payload))
+        backend.push(queue_name, json.dumps(payload))
         return True
     except Exception:
         return False
 
 
 def dequeue_job(queue_name: str, timeout: int = 5) -> Optional[dict[str, Any]]:
-    client = _get_client()
-    if not client:
+    backend = _get_consumer_backend()
+    if not backend:
         return None
     try:
-        item = client.blpop(queue_name, timeout=timeout)
-        if not item:
+        raw = backend.pop(queue_name, timeout)
+        if raw is None:
             return None
-        _, raw = item
         return json.loads(raw)
     except Exception:
         return None
@@ -0,0 +1,87 @@
+from contextvars import ContextVar
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+_request_loaders: ContextVar[Optional[dict]] = ContextVar("request_loaders", default=None)
+
+
+# Batches primary key lookups for one model and keeps what it resolved in an
+# identity map for the rest of the request.
+class BatchLoader:
+    def __init__(self, db: Session, model):
+        self.db = db
+        self.model = model
+        self._rows: dict[int, Any] = {}
+        self._pending: set[int] = set()
+
+    def enqueue(self, ids: Iterable[int]) -> None:
+        # Deferred ids are resolved together with the next load.
+        self._pending.update(entity_id for entity_id in ids if entity_id is not None and entity_id not in self._rows)
+
+    def prime(self, rows: Iterable[Any]) -> None:
+        for row in rows:
+            self._rows[row.id] = row
+
+    def forget(self, ids: Iterable[int]) -> None:
+        for entity_id in ids:
+            self._rows.pop(entity_id, None)
+
+    def load(self, entity_id: int):
+        return self.load_many([entity_id])[0]
+
+    def load_many(self, ids: Iterable[int]) -> list[Any]:
+        ids = list(ids)
+        self.enqueue(ids)
+        self._take_from_session()
+        if self._pending:
+            self._dispatch()
+        return [self._rows.get(entity_id) for entity_id in ids]
+
+    def _take_from_session(self) -> None:
+        # Rows the session already holds (eager loaded with a page, say) are
+        # reused as long as they were not expired by a commit since.
+        for entity_id in list(self._pending):
+            row = self.db.identity_map.get(identity_key(self.model, entity_id))
+            if row is not None and not inspect(row).expired_attributes:
+                self._rows[entity_id] = row
+                self._pending.discard(entity_id)
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, set()
+        rows = self.db.query(self.model).filter(self.model.id.in_(pending)).all()
+        self.prime(rows)
+        # Misses are remembered too, so a missing id is not queried again.
+        for entity_id in pending:
+            self._rows.setdefault(entity_id, None)
+
+
+def get_loader(db: Session, model) -> BatchLoader:
+    # Outside of a request (workers, scripts) every call gets a fresh loader,
+    # which still batches but remembers nothing.
+    loaders = _request_loaders.get()
+    if loaders is None:
+        return BatchLoader(db, model)
+    loader = loaders.get((db, model))
+    if loader is None:
+        loader = loaders[(db, model)] = BatchLoader(db, model)
+    return loader
+
+
+# Opens a loader scope per HTTP request. The dict is shared with the copies
+# of the context that sync endpoints and dependencies run in.
+class RequestLoadersMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_loaders.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_loaders.reset(token)
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Table
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, JSON, String, DateTime, Text, Table
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from infrastructure.db.session import Base
@@ -17,6 +17,8 @@ class User(Base):
     avatar_size = Column(Integer, nullable=True)
     only_followers_can_ask = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Unread direct messages across all conversations, see MessageRepository.
+    unread_messages_count = Column(Integer, default=0, nullable=False)
 
     # Questions asked by this user
     questions_asked = relationship("Question", back_populates="asker", foreign_keys="Question.asker_id")
@@ -71,10 +73,16 @@ class Answer(Base):
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    like_count = Column(Integer, default=0, nullable=False)
     
     question_id = Column(Integer, ForeignKey("questions.id"))
     author_id = Column(Integer, ForeignKey("users.id"))
 
+    __table_args__ = (
+        # Serves the feed: newest answers of a set of authors, in cursor order.
+        Index("idx_answers_author_id_created_at_id", author_id, created_at.desc(), id.desc()),
+    )
+
     question = relationship("Question", back_populates="answers")
     author = relationship("User", back_populates="answers")
     likes = relationship("AnswerLike", back_populates="answer")
@@ -169,6 +177,16 @@ class Conversation(Base):
     user1_id = Column(Integer, ForeignKey("users.id"))
     user2_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Denormalized from direct_messages by MessageRepository, so the inbox is
+    # one query. No foreign key: messages are deleted before this is moved.
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    # Messages each participant has not read yet.
+    user1_unread_count = Column(Integer, default=0, nullable=False)
+    user2_unread_count = Column(Integer, default=0, nullable=False)
+    # Read receipts: the highest message id each participant has read.
+    user1_last_read_message_id = Column(Integer, nullable=True)
+    user2_last_read_message_id = Column(Integer, nullable=True)
 
     user1 = relationship("User", foreign_keys=[user1_id])
     user2 = relationship("User", foreign_keys=[user2_id])
@@ -185,6 +203,9 @@ class DirectMessage(Base):
     content = Column(Text)
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # [{"emoji", "count"}] kept up to date by MessageRepository; NULL for
+    # messages from before the column, which are aggregated on read.
+    reaction_counts = Column(JSON, nullable=True)
 
     conversation = relationship("Conversation", back_populates="messages")
     sender = relationship("User", foreign_keys=[sender_id])
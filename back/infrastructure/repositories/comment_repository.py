@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from ..db import models
+from ..db.loaders import get_loader
 from domain import schemas
 
 class CommentRepository:
@@ -18,10 +19,14 @@ class CommentRepository:
         return db_comment
 
     def get_by_answer_id(self, answer_id: int, skip: int = 0, limit: int = 10):
-        return self.db.query(models.Comment)\
+        comments = self.db.query(models.Comment)\
             .filter(models.Comment.answer_id == answer_id)\
             .order_by(models.Comment.created_at.asc())\
             .offset(skip).limit(limit).all()
+        # The page's authors in one IN query; each comment's user is then
+        # served from the identity map instead of a lazy load per comment.
+        get_loader(self.db, models.User).load_many({comment.user_id for comment in comments})
+        return comments
 
     def get_by_id(self, comment_id: int):
         return self.db.query(models.Comment).filter(models.Comment.id == comment_id).first()
@@ -1,3 +1,4 @@
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 from ..db import models
 
@@ -22,10 +23,34 @@ class ConversationRepository:
         self.db.refresh(conversation)
         return conversation
 
-    def get_for_user(self, user_id: int, skip: int = 0, limit: int = 50):
-        return self.db.query(models.Conversation).filter(
-            (models.Conversation.user1_id == user_id) | (models.Conversation.user2_id == user_id)
-        ).order_by(models.Conversation.created_at.desc()).offset(skip).limit(limit).all()
+    def get_inbox(self, user_id: int, skip: int = 0, limit: int = 50):
+        # (conversation, last message or None, other user) rows, most recently
+        # active first; conversations without messages count from creation.
+        other_user_id = case(
+            (models.Conversation.user1_id == user_id, models.Conversation.user2_id),
+            else_=models.Conversation.user1_id
+        )
+        last_activity = func.coalesce(models.Conversation.last_message_at, models.Conversation.created_at)
+        return self.db.query(models.Conversation, models.DirectMessage, models.User)\
+            .outerjoin(models.DirectMessage, models.DirectMessage.id == models.Conversation.last_message_id)\
+            .join(models.User, models.User.id == other_user_id)\
+            .filter((models.Conversation.user1_id == user_id) | (models.Conversation.user2_id == user_id))\
+            .order_by(last_activity.desc(), models.Conversation.id.desc())\
+            .offset(skip).limit(limit).all()
+
+    def unread_count_column(self, user_id: int):
+        return case(
+            (models.Conversation.user1_id == user_id, models.Conversation.user1_unread_count),
+            else_=models.Conversation.user2_unread_count
+        )
+
+    def get_unread_counts(self, user_id: int):
+        unread_count = self.unread_count_column(user_id)
+        rows = self.db.query(models.Conversation.id, unread_count)\
+            .filter((models.Conversation.user1_id == user_id) | (models.Conversation.user2_id == user_id))\
+            .filter(unread_count > 0)\
+            .all()
+        return {conversation_id: count for conversation_id, count in rows}
 
     def delete_conversation(self, conversation_id: int):
         conversation = self.get_by_id(conversation_id)
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, select
 from datetime import datetime
 from ..db import models
 
@@ -13,9 +13,20 @@ class MessageRepository:
             sender_id=sender_id,
             receiver_id=receiver_id,
             reply_to_message_id=reply_to_message_id,
-            content=content
+            content=content,
+            reaction_counts=[]
         )
         self.db.add(message)
+        self.db.flush()
+        # Only ever moves forward, so concurrent sends cannot rewind it.
+        self.db.query(models.Conversation).filter(
+            models.Conversation.id == conversation_id,
+            (models.Conversation.last_message_id == None) | (models.Conversation.last_message_id < message.id)
+        ).update({
+            "last_message_id": message.id,
+            "last_message_at": select(models.DirectMessage.created_at).where(models.DirectMessage.id == message.id).scalar_subquery()
+        }, synchronize_session=False)
+        self._add_unread(self.db.get(models.Conversation, conversation_id), receiver_id, 1)
         self.db.commit()
         self.db.refresh(message)
         return message
@@ -33,21 +44,83 @@ class MessageRepository:
             ((models.DirectMessage.created_at == before_created_at) & (models.DirectMessage.id < before_id))
         ).order_by(models.DirectMessage.created_at.desc(), models.DirectMessage.id.desc()).limit(limit).all()
 
+    def get_latest(self, conversation_id: int, limit: int):
+        messages = self.db.query(models.DirectMessage).filter(
+            models.DirectMessage.conversation_id == conversation_id
+        ).order_by(models.DirectMessage.created_at.desc(), models.DirectMessage.id.desc()).limit(limit).all()
+        return list(reversed(messages))
+
     def get_by_id(self, message_id: int):
         return self.db.query(models.DirectMessage).filter(models.DirectMessage.id == message_id).first()
 
     def get_last_message(self, conversation_id: int):
         return self.db.query(models.DirectMessage).filter(
             models.DirectMessage.conversation_id == conversation_id
-        ).order_by(models.DirectMessage.created_at.desc()).first()
+        ).order_by(models.DirectMessage.created_at.desc(), models.DirectMessage.id.desc()).first()
 
-    def mark_read(self, conversation_id: int, user_id: int):
-        self.db.query(models.DirectMessage).filter(
-            models.DirectMessage.conversation_id == conversation_id,
+    def mark_read(self, conversation_id: int, user_id: int, up_to_message_id: int | None = None):
+        # Returns how many messages were marked, 0 when there was nothing unread.
+        conversation = self.db.get(models.Conversation, conversation_id)
+        if conversation is None:
+            return 0
+        marked = self._mark_read(conversation, user_id, up_to_message_id or conversation.last_message_id)
+        self.db.commit()
+        return marked
+
+    def apply_read_receipts(self, receipts: list[tuple[int, int, int]]):
+        # One transaction for a whole batch of (conversation, user, message id)
+        # receipts; returns the receipts that advanced.
+        advanced = []
+        for conversation_id, user_id, message_id in receipts:
+            conversation = self.db.get(models.Conversation, conversation_id)
+            if conversation and self._mark_read(conversation, user_id, message_id):
+                advanced.append((conversation_id, user_id, message_id))
+        self.db.commit()
+        return advanced
+
+    def _mark_read(self, conversation, user_id: int, up_to_message_id: int | None):
+        if up_to_message_id is None:
+            return 0
+        if conversation.user1_id == user_id:
+            last_read = models.Conversation.user1_last_read_message_id
+        else:
+            last_read = models.Conversation.user2_last_read_message_id
+        # The high-water mark only moves forward; nothing else is written
+        # unless it does.
+        moved = self.db.query(models.Conversation).filter(
+            models.Conversation.id == conversation.id,
+            (last_read == None) | (last_read < up_to_message_id)
+        ).update({last_read: up_to_message_id}, synchronize_session=False)
+        if not moved:
+            return 0
+        marked = self.db.query(models.DirectMessage).filter(
+            models.DirectMessage.conversation_id == conversation.id,
             models.DirectMessage.receiver_id == user_id,
+            models.DirectMessage.id <= up_to_message_id,
             models.DirectMessage.is_read == False
-        ).update({"is_read": True})
-        self.db.commit()
+        ).update({"is_read": True}, synchronize_session=False)
+        if marked:
+            self._add_unread(conversation, user_id, -marked)
+        return marked
+
+    def _add_unread(self, conversation, user_id: int, amount: int):
+        # Counters are moved with relative updates so concurrent writers do
+        # not overwrite each other, and never go below zero.
+        if conversation is None:
+            return
+        if conversation.user1_id == user_id:
+            column = models.Conversation.user1_unread_count
+        else:
+            column = models.Conversation.user2_unread_count
+        self.db.query(models.Conversation).filter(models.Conversation.id == conversation.id).update(
+            {column: case((column + amount > 0, column + amount), else_=0)},
+            synchronize_session=False
+        )
+        total = models.User.unread_messages_count
+        self.db.query(models.User).filter(models.User.id == user_id).update(
+            {total: case((total + amount > 0, total + amount), else_=0)},
+            synchronize_session=False
+        )
 
     def delete_message(self, message_id: int, user_id: int):
         message = self.get_by_id(message_id)
@@ -59,10 +132,22 @@ class MessageRepository:
             models.MessageReaction.message_id == message_id
         ).delete()
         self.db.delete(message)
+        self.db.flush()
+        conversation = self.db.get(models.Conversation, message.conversation_id)
+        if not message.is_read:
+            self._add_unread(conversation, message.receiver_id, -1)
+        if conversation and conversation.last_message_id == message_id:
+            last_message = self.get_last_message(message.conversation_id)
+            conversation.last_message_id = last_message.id if last_message else None
+            conversation.last_message_at = last_message.created_at if last_message else None
         self.db.commit()
         return message
 
     def delete_by_conversation(self, conversation_id: int):
+        conversation = self.db.get(models.Conversation, conversation_id)
+        if conversation:
+            self._add_unread(conversation, conversation.user1_id, -conversation.user1_unread_count)
+            self._add_unread(conversation, conversation.user2_id, -conversation.user2_unread_count)
         message_ids = [m.id for m in self.db.query(models.DirectMessage.id).filter(
             models.DirectMessage.conversation_id == conversation_id
         ).all()]
@@ -76,28 +161,59 @@ class MessageRepository:
         self.db.commit()
 
     def add_reaction(self, message_id: int, user_id: int, emoji: str):
+        self._lock_message(message_id)
         exists = self.db.query(models.MessageReaction).filter(
             models.MessageReaction.message_id == message_id,
             models.MessageReaction.user_id == user_id,
             models.MessageReaction.emoji == emoji
         ).first()
         if exists:
+            # Nothing to write; end the transaction to release the row lock.
+            self.db.rollback()
             return exists
         reaction = models.MessageReaction(message_id=message_id, user_id=user_id, emoji=emoji)
         self.db.add(reaction)
+        self.db.flush()
+        self._store_reaction_counts(message_id)
         self.db.commit()
         return reaction
 
     def remove_reaction(self, message_id: int, user_id: int, emoji: str):
+        self._lock_message(message_id)
         self.db.query(models.MessageReaction).filter(
             models.MessageReaction.message_id == message_id,
             models.MessageReaction.user_id == user_id,
             models.MessageReaction.emoji == emoji
         ).delete()
+        self._store_reaction_counts(message_id)
         self.db.commit()
 
+    def _lock_message(self, message_id: int):
+        # Reaction changes on one message are serialized, so each recomputed
+        # summary sees every reaction committed before it.
+        self.db.query(models.DirectMessage.id).filter(models.DirectMessage.id == message_id).with_for_update().first()
+
+    def _store_reaction_counts(self, message_id: int):
+        self.db.query(models.DirectMessage).filter(models.DirectMessage.id == message_id).update(
+            {"reaction_counts": self.get_reaction_summary(message_id)},
+            synchronize_session=False
+        )
+
     def get_reaction_summary(self, message_id: int):
-        rows = self.db.query(models.MessageReaction.emoji, func.count(models.MessageReaction.id)).filter(
-            models.MessageReaction.message_id == message_id
-        ).group_by(models.MessageReaction.emoji).all()
-        return [{"emoji": r[0], "count": r[1]} for r in rows]
+        return self.get_reaction_summaries([message_id]).get(message_id, [])
+
+    def get_reaction_summaries(self, message_ids: list[int]):
+        # One aggregate for a whole page of messages.
+        if not message_ids:
+            return {}
+        rows = self.db.query(
+            models.MessageReaction.message_id,
+            models.MessageReaction.emoji,
+            func.count(models.MessageReaction.id)
+        ).filter(
+            models.MessageReaction.message_id.in_(message_ids)
+        ).group_by(models.MessageReaction.message_id, models.MessageReaction.emoji).all()
+        summaries = {}
+        for message_id, emoji, count in rows:
+            summaries.setdefault(message_id, []).append({"emoji": emoji, "count": count})
+        return summaries
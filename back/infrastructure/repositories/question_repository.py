@@ -1,9 +1,17 @@
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime
 from ..db import models
+from ..db.loaders import get_loader
 from domain import schemas
 
+# Answer pages are cached with their question embedded (see entity_cache),
+# so the questions come with the page in one IN query instead of a lazy load
+# per answer. Users are not eager loaded: they are hydrated from the user
+# entities, and the few that miss are fetched in one batch by the loader.
+ANSWER_PAGE_OPTIONS = (selectinload(models.Answer.question),)
+
 class QuestionRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -52,20 +60,20 @@ class QuestionRepository:
         self.db.refresh(db_answer)
         return db_answer
 
+    def _followed_ids(self, user_id: int):
+        # Kept as a subquery so the follow list is never materialized in Python.
+        return select(models.Follow.followed_id).where(models.Follow.follower_id == user_id)
+
     def get_feed(self, user_id: int, skip: int = 0, limit: int = 10):
         # Feed should show answers from people I follow
-        following = self.db.query(models.Follow).filter(models.Follow.follower_id == user_id).all()
-        followed_ids = [f.followed_id for f in following]
-        
-        return self.db.query(models.Answer).filter(models.Answer.author_id.in_(followed_ids))\
-            .order_by(models.Answer.created_at.desc())\
+        return self.db.query(models.Answer).options(*ANSWER_PAGE_OPTIONS)\
+            .filter(models.Answer.author_id.in_(self._followed_ids(user_id)))\
+            .order_by(models.Answer.created_at.desc(), models.Answer.id.desc())\
             .offset(skip).limit(limit).all()
 
     def get_feed_before(self, user_id: int, before_created_at: datetime, before_id: int, limit: int = 10):
-        following = self.db.query(models.Follow).filter(models.Follow.follower_id == user_id).all()
-        followed_ids = [f.followed_id for f in following]
-
-        return self.db.query(models.Answer).filter(models.Answer.author_id.in_(followed_ids))\
+        return self.db.query(models.Answer).options(*ANSWER_PAGE_OPTIONS)\
+            .filter(models.Answer.author_id.in_(self._followed_ids(user_id)))\
             .filter(
                 (models.Answer.created_at < before_created_at) |
                 ((models.Answer.created_at == before_created_at) & (models.Answer.id < before_id))
@@ -73,13 +81,78 @@ class QuestionRepository:
             .order_by(models.Answer.created_at.desc(), models.Answer.id.desc())\
             .limit(limit).all()
 
+    def get_feed_entries(self, user_id: int, limit: int, exclude_author_ids: list[int] | None = None):
+        query = self.db.query(models.Answer.id, models.Answer.created_at)\
+            .filter(models.Answer.author_id.in_(self._followed_ids(user_id)))
+        if exclude_author_ids:
+            query = query.filter(models.Answer.author_id.notin_(exclude_author_ids))
+        return query.order_by(models.Answer.created_at.desc(), models.Answer.id.desc())\
+            .limit(limit).all()
+
+    def get_author_feed_entries(self, author_id: int, limit: int, before_created_at: datetime | None = None, before_id: int | None = None):
+        query = self.db.query(models.Answer.id, models.Answer.created_at)\
+            .filter(models.Answer.author_id == author_id)
+        if before_created_at is not None:
+            query = query.filter(
+                (models.Answer.created_at < before_created_at) |
+                ((models.Answer.created_at == before_created_at) & (models.Answer.id < before_id))
+            )
+        return query.order_by(models.Answer.created_at.desc(), models.Answer.id.desc())\
+            .limit(limit).all()
+
+    def get_answers_by_ids(self, answer_ids: list[int]):
+        answers = [answer for answer in get_loader(self.db, models.Answer).load_many(answer_ids) if answer is not None]
+        self._load_answer_relations(answers)
+        return answers
+
+    def _load_answer_relations(self, answers):
+        # Many-to-one lazy loads are served from the session's identity map,
+        # so resolving questions and users up front in one IN query each
+        # keeps serialization from issuing a query per answer.
+        questions = get_loader(self.db, models.Question).load_many({answer.question_id for answer in answers})
+        user_ids = {answer.author_id for answer in answers}
+        for question in questions:
+            if question is not None:
+                user_ids.update((question.receiver_id, question.asker_id))
+        get_loader(self.db, models.User).load_many(user_ids - {None})
+
+    def count_followers(self, user_id: int):
+        return self.db.query(models.Follow).filter(models.Follow.followed_id == user_id).count()
+
+    def get_followed_among(self, user_id: int, author_ids: list[int]):
+        if not author_ids:
+            return []
+        rows = self.db.query(models.Follow.followed_id).filter(
+            models.Follow.follower_id == user_id,
+            models.Follow.followed_id.in_(author_ids)
+        ).all()
+        return [row[0] for row in rows]
+
+    def get_follower_id_batches(self, user_id: int, batch_size: int = 1000):
+        # Keyset pagination over the follow graph so large audiences are never
+        # loaded at once.
+        last_id = 0
+        while True:
+            rows = self.db.query(models.Follow.follower_id).filter(
+                models.Follow.followed_id == user_id,
+                models.Follow.follower_id > last_id
+            ).order_by(models.Follow.follower_id).limit(batch_size).all()
+            follower_ids = [row[0] for row in rows]
+            if follower_ids:
+                yield follower_ids
+            if len(follower_ids) < batch_size:
+                return
+            last_id = follower_ids[-1]
+
     def get_user_answers(self, user_id: int, skip: int = 0, limit: int = 10):
-        return self.db.query(models.Answer).filter(models.Answer.author_id == user_id)\
+        return self.db.query(models.Answer).options(*ANSWER_PAGE_OPTIONS)\
+            .filter(models.Answer.author_id == user_id)\
             .order_by(models.Answer.created_at.desc())\
             .offset(skip).limit(limit).all()
 
     def get_user_answers_before(self, user_id: int, before_created_at: datetime, before_id: int, limit: int = 10):
-        return self.db.query(models.Answer).filter(models.Answer.author_id == user_id)\
+        return self.db.query(models.Answer).options(*ANSWER_PAGE_OPTIONS)\
+            .filter(models.Answer.author_id == user_id)\
             .filter(
                 (models.Answer.created_at < before_created_at) |
                 ((models.Answer.created_at == before_created_at) & (models.Answer.id < before_id))
@@ -91,7 +164,7 @@ class QuestionRepository:
         return self.db.query(models.Question).filter(models.Question.id == question_id).first()
 
     def get_answer_by_id(self, answer_id: int):
-        return self.db.query(models.Answer).filter(models.Answer.id == answer_id).first()
+        return get_loader(self.db, models.Answer).load(answer_id)
 
     def delete_question(self, question_id: int):
         question = self.get_question_by_id(question_id)
@@ -101,6 +174,7 @@ class QuestionRepository:
             # Or rely on models. 
             # Let's try simple delete. If it fails due to FK, we fix.
             # Usually better to delete answers first.
+            get_loader(self.db, models.Answer).forget([answer.id for answer in question.answers])
             self.db.query(models.Answer).filter(models.Answer.question_id == question_id).delete()
             self.db.delete(question)
             self.db.commit()
@@ -118,12 +192,59 @@ class QuestionRepository:
             
         like = models.AnswerLike(user_id=user_id, answer_id=answer_id)
         self.db.add(like)
+        self.db.query(models.Answer).filter(models.Answer.id == answer_id)\
+            .update({models.Answer.like_count: models.Answer.like_count + 1})
         self.db.commit()
         return like
 
     def unlike_answer(self, user_id: int, answer_id: int):
-        self.db.query(models.AnswerLike).filter(
+        deleted = self.db.query(models.AnswerLike).filter(
             models.AnswerLike.user_id == user_id,
             models.AnswerLike.answer_id == answer_id
         ).delete()
+        if deleted:
+            self.db.query(models.Answer).filter(models.Answer.id == answer_id)\
+                .update({models.Answer.like_count: models.Answer.like_count - deleted})
+        self.db.commit()
+
+    def get_liked_answer_ids(self, user_id: int, answer_ids: list[int]):
+        if not answer_ids:
+            return set()
+        rows = self.db.query(models.AnswerLike.answer_id).filter(
+            models.AnswerLike.user_id == user_id,
+            models.AnswerLike.answer_id.in_(answer_ids)
+        ).all()
+        return {row[0] for row in rows}
+
+    def is_liked(self, user_id: int, answer_id: int):
+        return self.db.query(models.AnswerLike).filter(
+            models.AnswerLike.user_id == user_id,
+            models.AnswerLike.answer_id == answer_id
+        ).first() is not None
+
+    def apply_like_states(self, states: list[tuple[int, int, bool]]):
+        # Idempotent: each (answer, user) pair is driven to its final state and
+        # counters only move by the rows actually inserted or deleted.
+        if not states:
+            return
+        pairs = [(answer_id, user_id) for answer_id, user_id, _ in states]
+        existing = set(self.db.query(models.AnswerLike.answer_id, models.AnswerLike.user_id).filter(
+            tuple_(models.AnswerLike.answer_id, models.AnswerLike.user_id).in_(pairs)
+        ).all())
+        to_insert = [(answer_id, user_id) for answer_id, user_id, liked in states if liked and (answer_id, user_id) not in existing]
+        to_delete = [(answer_id, user_id) for answer_id, user_id, liked in states if not liked and (answer_id, user_id) in existing]
+        deltas = {}
+        for answer_id, user_id in to_insert:
+            self.db.add(models.AnswerLike(user_id=user_id, answer_id=answer_id))
+            deltas[answer_id] = deltas.get(answer_id, 0) + 1
+        if to_delete:
+            self.db.query(models.AnswerLike).filter(
+                tuple_(models.AnswerLike.answer_id, models.AnswerLike.user_id).in_(to_delete)
+            ).delete(synchronize_session=False)
+            for answer_id, _ in to_delete:
+                deltas[answer_id] = deltas.get(answer_id, 0) - 1
+        for answer_id, delta in deltas.items():
+            if delta:
+                self.db.query(models.Answer).filter(models.Answer.id == answer_id)\
+                    .update({models.Answer.like_count: models.Answer.like_count + delta}, synchronize_session=False)
         self.db.commit()
@@ -1,6 +1,7 @@
 
 from sqlalchemy.orm import Session
 from ..db import models
+from ..db.loaders import get_loader
 from domain import schemas
 
 class UserRepository:
@@ -8,13 +9,23 @@ class UserRepository:
         self.db = db
 
     def get_by_id(self, user_id: int):
-        return self.db.query(models.User).filter(models.User.id == user_id).first()
+        return get_loader(self.db, models.User).load(user_id)
+
+    def get_by_ids(self, user_ids: list[int]):
+        return [user for user in get_loader(self.db, models.User).load_many(user_ids) if user is not None]
 
     def get_by_username(self, username: str):
-        return self.db.query(models.User).filter(models.User.username == username).first()
+        return self._prime(self.db.query(models.User).filter(models.User.username == username).first())
 
     def get_by_email(self, email: str):
-        return self.db.query(models.User).filter(models.User.email == email).first()
+        return self._prime(self.db.query(models.User).filter(models.User.email == email).first())
+
+    def _prime(self, user):
+        # Users looked up by another key (e.g. the current user) are then
+        # served from the loader when something asks for them by id.
+        if user is not None:
+            get_loader(self.db, models.User).prime([user])
+        return user
 
     def create(self, user: schemas.UserCreate, hashed_password: str):
         db_user = models.User(
@@ -25,7 +36,7 @@ class UserRepository:
         self.db.add(db_user)
         self.db.commit()
         self.db.refresh(db_user)
-        return db_user
+        return self._prime(db_user)
 
     def get_all(self, skip: int = 0, limit: int = 10):
         return self.db.query(models.User).offset(skip).limit(limit).all()
@@ -1,28 +1,156 @@
-
-from typing import List, Dict
+import asyncio
+from typing import List, Dict, Optional, Set
 from fastapi import WebSocket
+import redis.asyncio as aioredis
+
+from core.config import settings
+from infrastructure.cache.async_redis_client import build_async_connection_pool, get_async_redis
+
+CHANNEL_PREFIX = "ws:user:"
+
+
+# Queued by Connection.close to stop the writer.
+_CLOSE = object()
+
+
+def user_channel(user_id: int) -> str:
+    return f"{CHANNEL_PREFIX}{user_id}"
+
+
+class Connection:
+    # A socket with a bounded outbound queue drained by its own writer task,
+    # so producers never wait on a slow client.
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WEBSOCKET_SEND_QUEUE_SIZE)
+        self.closing = False
+        self.writer = asyncio.create_task(self._write())
+
+    def send(self, message: str):
+        if self.closing:
+            return
+        if self.queue.full():
+            if settings.WEBSOCKET_SEND_OVERFLOW == "disconnect":
+                self.close()
+                return
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    def close(self):
+        # Whatever is still queued is dropped; the client has fallen too far behind.
+        self.closing = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSE)
+
+    async def _write(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                if message is _CLOSE:
+                    break
+                await self.websocket.send_text(message)
+        except Exception:
+            pass
+        # The endpoint's receive loop then sees the disconnect and unregisters us.
+        self.closing = True
+        try:
+            await self.websocket.close(code=1013)
+        except Exception:
+            pass
+
 
 class ConnectionManager:
     def __init__(self):
         # Map user_id to list of active websockets (user might have multiple tabs)
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+        self.active_connections: Dict[int, List[Connection]] = {}
+        # With Redis, messages are published on a channel per user and every
+        # process subscribes to the users connected to it.
+        self._pubsub: Optional[aioredis.client.PubSub] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed: Set[int] = set()
+        # Subscription changes are serialized, so an UNSUBSCRIBE still in
+        # flight cannot drop the channel of a user who has just reconnected.
+        self._subscription_lock = asyncio.Lock()
 
     async def connect(self, websocket: WebSocket, user_id: int):
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        self.active_connections.setdefault(user_id, []).append(Connection(websocket))
+        await self._sync_subscription(user_id)
 
-    def disconnect(self, websocket: WebSocket, user_id: int):
+    async def disconnect(self, websocket: WebSocket, user_id: int):
         if user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
+            for connection in self.active_connections[user_id]:
+                if connection.websocket is websocket:
+                    connection.writer.cancel()
+                    self.active_connections[user_id].remove(connection)
+                    break
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
+                await self._sync_subscription(user_id)
 
     async def send_personal_message(self, message: str, user_id: int):
-        if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                await connection.send_text(message)
+        published = False
+        client = get_async_redis()
+        if client is not None:
+            try:
+                await client.publish(user_channel(user_id), message)
+                published = True
+            except Exception:
+                pass
+        # Local sockets this process could not subscribe for are served directly.
+        if not published or user_id not in self._subscribed:
+            self._deliver(user_id, message)
+
+    def _deliver(self, user_id: int, message: str):
+        for connection in self.active_connections.get(user_id, []):
+            connection.send(message)
+
+    async def _sync_subscription(self, user_id: int):
+        # Decided under the lock from the sockets connected by then, not from
+        # the state that triggered the call.
+        async with self._subscription_lock:
+            if user_id in self.active_connections:
+                if user_id not in self._subscribed:
+                    await self._subscribe(user_id)
+            elif user_id in self._subscribed:
+                await self._unsubscribe(user_id)
+
+    async def _subscribe(self, user_id: int):
+        if not settings.REDIS_URL:
+            return
+        try:
+            if self._pubsub is None:
+                # Its own pool without a socket timeout, the listener idles on it.
+                client = aioredis.Redis(connection_pool=build_async_connection_pool(None))
+                self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.subscribe(user_channel(user_id))
+        except Exception:
+            return
+        self._subscribed.add(user_id)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _unsubscribe(self, user_id: int):
+        self._subscribed.discard(user_id)
+        try:
+            await self._pubsub.unsubscribe(user_channel(user_id))
+        except Exception:
+            pass
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The pubsub reconnects and resubscribes on the next read.
+                await asyncio.sleep(1)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            user_id = int(message["channel"].decode()[len(CHANNEL_PREFIX):])
+            self._deliver(user_id, message["data"].decode())
 
 manager = ConnectionManager()
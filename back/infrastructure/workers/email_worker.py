@@ -4,13 +4,13 @@ import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from infrastructure.cache.redis_queue import dequeue_job
+from infrastructure.cache.async_redis_queue import dequeue_job
 from infrastructure.mail.reset_email import send_reset_email
 
 
 async def run():
     while True:
-        job = dequeue_job("email_queue", timeout=5)
+        job = await dequeue_job("email_queue", timeout=5)
         if not job:
             await asyncio.sleep(0.2)
             continue
@@ -0,0 +1,38 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from core.config import settings
+from infrastructure.cache.entity_cache import invalidate_answers
+from infrastructure.cache.like_buffer import finish_likes_flush, take_pending_likes
+from infrastructure.db.session import SessionLocal
+from infrastructure.repositories.question_repository import QuestionRepository
+
+
+def flush_likes():
+    states = take_pending_likes()
+    if not states:
+        return 0
+    db = SessionLocal()
+    try:
+        QuestionRepository(db).apply_like_states(states)
+    finally:
+        db.close()
+    finish_likes_flush()
+    invalidate_answers(list({answer_id for answer_id, _, _ in states}))
+    return len(states)
+
+
+async def run():
+    while True:
+        try:
+            flush_likes()
+        except Exception as e:
+            print(f"Like flush failed: {e}")
+        await asyncio.sleep(settings.LIKES_FLUSH_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
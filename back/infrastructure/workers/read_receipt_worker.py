@@ -0,0 +1,43 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from core.config import settings
+from infrastructure.cache.read_receipts import finish_reads_flush, take_pending_reads
+from infrastructure.cache.recent_messages import mark_recent_messages_read
+from infrastructure.cache.redis_client import cache_bump_namespaces, cache_delete
+from infrastructure.db.session import SessionLocal
+from infrastructure.repositories.message_repository import MessageRepository
+
+
+def flush_read_receipts():
+    receipts = take_pending_reads()
+    if not receipts:
+        return 0
+    db = SessionLocal()
+    try:
+        advanced = MessageRepository(db).apply_read_receipts(receipts)
+    finally:
+        db.close()
+    finish_reads_flush()
+    if advanced:
+        cache_bump_namespaces([f"messages:{conversation_id}" for conversation_id in {c for c, _, _ in advanced}])
+        cache_delete([f"conversations:{user_id}" for user_id in {u for _, u, _ in advanced}])
+        for conversation_id, user_id, message_id in advanced:
+            mark_recent_messages_read(conversation_id, user_id, message_id)
+    return len(receipts)
+
+
+async def run():
+    while True:
+        try:
+            flush_read_receipts()
+        except Exception as e:
+            print(f"Read receipt flush failed: {e}")
+        await asyncio.sleep(settings.READ_RECEIPTS_FLUSH_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -1,18 +1,37 @@
 
+import asyncio
 from fastapi import FastAPI, WebSocket, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from infrastructure.db import models
 from infrastructure.db.session import engine
+from infrastructure.db.loaders import RequestLoadersMiddleware
 from infrastructure.websockets import manager
-from api.v1.endpoints import auth, users, questions, notifications, messages, reports
+from api.v1.endpoints import auth, users, questions, notifications, messages, reports, metrics
 from api import deps
+from infrastructure.cache.backends import cache_backend_name
+from infrastructure.workers import email_worker
 
 # Create tables
 models.Base.metadata.create_all(bind=engine)
 
 # Manual migration for new columns (safe to run multiple times)
 from sqlalchemy import text
+
+def column_is_nullable(conn, table: str, column: str) -> bool:
+    # Backfills end with SET NOT NULL, so a NOT NULL column is already done and
+    # the table is neither scanned nor locked again.
+    return bool(conn.execute(text("""
+        SELECT is_nullable = 'YES' FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column
+    """), {"table": table, "column": column}).scalar())
+
+def column_exists(conn, table: str, column: str) -> bool:
+    return conn.execute(text("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column
+    """), {"table": table, "column": column}).first() is not None
+
 def run_migrations():
     with engine.connect() as conn:
         try:
@@ -57,14 +76,76 @@ def run_migrations():
             """))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_message_reactions_message_id ON message_reactions (message_id)"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_message_reactions_message_id_emoji ON message_reactions (message_id, emoji)"))
+            conn.execute(text("ALTER TABLE direct_messages ADD COLUMN IF NOT EXISTS reaction_counts JSON"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_conversations_user1_id ON conversations (user1_id)"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_conversations_user2_id ON conversations (user2_id)"))
+            # Both columns stay nullable for conversations without messages, so
+            # the backfill runs only when they are added rather than every boot.
+            if not column_exists(conn, "conversations", "last_message_at"):
+                conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS last_message_id INTEGER"))
+                conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS last_message_at TIMESTAMPTZ"))
+                conn.execute(text("""
+                    UPDATE conversations SET
+                        last_message_id = last.id,
+                        last_message_at = last.created_at
+                    FROM (
+                        SELECT DISTINCT ON (conversation_id) conversation_id, id, created_at
+                        FROM direct_messages
+                        ORDER BY conversation_id, created_at DESC, id DESC
+                    ) AS last
+                    WHERE last.conversation_id = conversations.id AND conversations.last_message_id IS NULL
+                """))
+            conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS user1_unread_count INTEGER"))
+            conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS user2_unread_count INTEGER"))
+            if column_is_nullable(conn, "conversations", "user1_unread_count") or column_is_nullable(conn, "conversations", "user2_unread_count"):
+                conn.execute(text("""
+                    UPDATE conversations SET
+                        user1_unread_count = (
+                            SELECT COUNT(*) FROM direct_messages
+                            WHERE direct_messages.conversation_id = conversations.id
+                                AND direct_messages.receiver_id = conversations.user1_id
+                                AND direct_messages.is_read = FALSE
+                        ),
+                        user2_unread_count = (
+                            SELECT COUNT(*) FROM direct_messages
+                            WHERE direct_messages.conversation_id = conversations.id
+                                AND direct_messages.receiver_id = conversations.user2_id
+                                AND direct_messages.is_read = FALSE
+                        )
+                    WHERE user1_unread_count IS NULL OR user2_unread_count IS NULL
+                """))
+                conn.execute(text("ALTER TABLE conversations ALTER COLUMN user1_unread_count SET DEFAULT 0"))
+                conn.execute(text("ALTER TABLE conversations ALTER COLUMN user1_unread_count SET NOT NULL"))
+                conn.execute(text("ALTER TABLE conversations ALTER COLUMN user2_unread_count SET DEFAULT 0"))
+                conn.execute(text("ALTER TABLE conversations ALTER COLUMN user2_unread_count SET NOT NULL"))
+            conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS user1_last_read_message_id INTEGER"))
+            conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS user2_last_read_message_id INTEGER"))
+            conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS unread_messages_count INTEGER"))
+            if column_is_nullable(conn, "users", "unread_messages_count"):
+                conn.execute(text("""
+                    UPDATE users SET unread_messages_count = (
+                        SELECT COUNT(*) FROM direct_messages
+                        WHERE direct_messages.receiver_id = users.id AND direct_messages.is_read = FALSE
+                    ) WHERE unread_messages_count IS NULL
+                """))
+                conn.execute(text("ALTER TABLE users ALTER COLUMN unread_messages_count SET DEFAULT 0"))
+                conn.execute(text("ALTER TABLE users ALTER COLUMN unread_messages_count SET NOT NULL"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_notifications_user_id ON notifications (user_id)"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_notifications_created_at ON notifications (created_at)"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_questions_receiver_id ON questions (receiver_id)"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_questions_created_at ON questions (created_at)"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_answers_author_id ON answers (author_id)"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_answers_created_at ON answers (created_at)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_answers_author_id_created_at_id ON answers (author_id, created_at DESC, id DESC)"))
+            conn.execute(text("ALTER TABLE answers ADD COLUMN IF NOT EXISTS like_count INTEGER"))
+            if column_is_nullable(conn, "answers", "like_count"):
+                conn.execute(text("""
+                    UPDATE answers SET like_count = (
+                        SELECT COUNT(*) FROM answer_likes WHERE answer_likes.answer_id = answers.id
+                    ) WHERE like_count IS NULL
+                """))
+                conn.execute(text("ALTER TABLE answers ALTER COLUMN like_count SET DEFAULT 0"))
+                conn.execute(text("ALTER TABLE answers ALTER COLUMN like_count SET NOT NULL"))
             conn.execute(text("""
                 CREATE TABLE IF NOT EXISTS answer_reports (
                     id SERIAL PRIMARY KEY,
@@ -98,6 +179,7 @@ run_migrations()
 app = FastAPI(title="iWonder API", version="1.0.0")
 
 app.add_middleware(GZipMiddleware, minimum_size=800)
+app.add_middleware(RequestLoadersMiddleware)
 
 # CORS
 origins = [
@@ -117,6 +199,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# A process-local queue is only visible to this process, so its consumer runs here too.
+@app.on_event("startup")
+async def start_in_process_workers():
+    if cache_backend_name() == "memory":
+        app.state.email_worker = asyncio.create_task(email_worker.run())
+
 # API Routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
@@ -124,6 +212,7 @@ app.include_router(questions.router, prefix="/api/v1/questions", tags=["question
 app.include_router(notifications.router, prefix="/api/v1/notifications", tags=["notifications"])
 app.include_router(messages.router, prefix="/api/v1/messages", tags=["messages"])
 app.include_router(reports.router, prefix="/api/v1/reports", tags=["reports"])
+app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["metrics"])
 
 @app.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: int):
@@ -134,7 +223,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
         while True:
             await websocket.receive_text()
     except:
-        manager.disconnect(websocket, user_id)
+        await manager.disconnect(websocket, user_id)
 
 @app.get("/")
 def read_root():
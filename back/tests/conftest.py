@@ -15,6 +15,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
 from infrastructure.db.session import Base
 
 from api.deps import get_db
+from infrastructure.cache.backends import get_memory_backend
+from infrastructure.cache.local_cache import local_cache
 from main import app
 
 # Use SQLite in-memory for tests
@@ -34,6 +36,8 @@ def db():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        # Release pooled connections before the file goes away.
+        engine.dispose()
         # remove file if exists
         try:
             if os.path.exists("./test.db"):
@@ -41,6 +45,15 @@ def db():
         except PermissionError:
             pass
 
+@pytest.fixture(scope="module", autouse=True)
+def reset_caches():
+    # Every module gets a fresh database whose ids are reused, so nothing
+    # cached in this process may outlive it.
+    get_memory_backend().clear()
+    local_cache.clear()
+    yield
+
+
 @pytest.fixture(scope="module")
 def client(db):
     def override_get_db():
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import orjson
+import pytest
+
+from core.config import settings
+from infrastructure.cache.codec import decode_body, decode_value, encode_body, encode_value
+
+PAYLOAD = {"id": 1, "content": "hello " * 200, "created_at": datetime(2026, 1, 1, 12, 30)}
+
+
+@pytest.fixture(autouse=True)
+def json_encoding(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_ENCODING", "json")
+    monkeypatch.setattr(settings, "CACHE_COMPRESSION_MIN_BYTES", 0)
+    monkeypatch.setattr(settings, "CACHE_COMPRESSION_LEVEL", 1)
+
+
+def test_plain_json_is_stored_as_is():
+    raw = encode_value(PAYLOAD)
+    assert raw == orjson.dumps(PAYLOAD)
+    assert decode_value(raw) == {**PAYLOAD, "created_at": "2026-01-01T12:30:00"}
+
+
+def test_payloads_over_the_threshold_are_zlib_framed(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_COMPRESSION_MIN_BYTES", 512)
+    small = {"id": 1}
+    assert encode_value(small) == orjson.dumps(small)
+
+    raw = encode_value(PAYLOAD)
+    assert raw[:3] == b"\x00jz"
+    assert len(raw) < len(orjson.dumps(PAYLOAD))
+    assert decode_value(raw) == decode_value(orjson.dumps(PAYLOAD))
+
+    body = orjson.dumps([PAYLOAD])
+    assert encode_body(body)[:3] == b"\x00jz"
+    assert decode_body(encode_body(body)) == body
+
+
+def test_msgpack_is_tagged(monkeypatch):
+    pytest.importorskip("msgpack")
+    monkeypatch.setattr(settings, "CACHE_ENCODING", "msgpack")
+    raw = encode_value(PAYLOAD)
+    assert raw[:3] == b"\x00m-"
+    assert decode_value(raw) == {**PAYLOAD, "created_at": "2026-01-01T12:30:00"}
+
+
+def test_entries_written_before_framing_still_decode():
+    assert decode_value(b'{"id": 1, "tags": ["a"]}') == {"id": 1, "tags": ["a"]}
+    assert decode_body(b'[{"id": 1}]') == b'[{"id": 1}]'
@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+
+from core.config import settings
+from infrastructure.cache.metrics import cache_metrics
+
+
+def get_auth_headers(client: TestClient, username, email, password):
+    client.post(
+        "/api/v1/users/",
+        json={"username": username, "email": email, "password": password}
+    )
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": username, "password": password}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_cache_metrics_per_key_family(client: TestClient, monkeypatch):
+    headers = get_auth_headers(client, "metrics_user", "metrics_user@example.com", "Password123!")
+    assert client.get("/api/v1/metrics/cache").status_code == 403
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "metrics-secret")
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "memory")
+    metrics_headers = {"X-Metrics-Token": "metrics-secret"}
+    assert client.get("/api/v1/metrics/cache", headers={"X-Metrics-Token": "wrong"}).status_code == 403
+    cache_metrics.reset()
+
+    client.get("/api/v1/questions/feed", headers=headers)
+    client.get("/api/v1/questions/feed", headers=headers)
+
+    metrics = client.get("/api/v1/metrics/cache", headers=metrics_headers).json()
+    feed = metrics["feed"]
+    assert feed["misses"] == 1
+    assert feed["hits"] == 1
+    assert feed["sets"] == 1
+    assert feed["bytes_written"] > 0
+    assert feed["latency"]["set"]["count"] == 1
+
+    text = client.get("/api/v1/metrics/cache/prometheus", headers=metrics_headers).text
+    assert 'cache_hits_total{family="feed"} 1' in text
+    assert 'cache_operation_seconds_count{family="feed",operation="set"} 1' in text
@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import fakeredis
+import orjson
+from fastapi.testclient import TestClient
+
+from infrastructure.cache import recent_messages
+from infrastructure.db import models
+
+
+def get_auth_headers(client: TestClient, username, email, password):
+    client.post(
+        "/api/v1/users/",
+        json={"username": username, "email": email, "password": password}
+    )
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": username, "password": password}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_conversations_sorted_by_last_activity(client: TestClient, db):
+    headers = get_auth_headers(client, "inbox_owner", "inbox_owner@example.com", "Password123!")
+    get_auth_headers(client, "inbox_first", "inbox_first@example.com", "Password123!")
+    get_auth_headers(client, "inbox_second", "inbox_second@example.com", "Password123!")
+
+    first = client.post("/api/v1/messages/start", json={"username": "inbox_first"}, headers=headers).json()
+    second = client.post("/api/v1/messages/start", json={"username": "inbox_second"}, headers=headers).json()
+    # SQLite timestamps have one second resolution; keep the creation times
+    # clearly before the message below.
+    db.query(models.Conversation).update({"created_at": datetime(2026, 1, 1)})
+    db.commit()
+
+    conversations = client.get("/api/v1/messages/conversations", headers=headers).json()
+    assert [c["id"] for c in conversations] == [second["id"], first["id"]]
+    assert conversations[0]["last_message"] is None
+
+    response = client.post(
+        f"/api/v1/messages/conversations/{first['id']}/messages",
+        json={"content": "Hello"},
+        headers=headers
+    )
+    assert response.status_code == 200
+
+    conversations = client.get("/api/v1/messages/conversations", headers=headers).json()
+    assert [c["id"] for c in conversations] == [first["id"], second["id"]]
+    assert conversations[0]["other_user"]["username"] == "inbox_first"
+    assert conversations[0]["last_message"]["content"] == "Hello"
+
+
+def test_message_page_includes_reaction_summaries(client: TestClient):
+    headers = get_auth_headers(client, "react_sender", "react_sender@example.com", "Password123!")
+    other_headers = get_auth_headers(client, "react_receiver", "react_receiver@example.com", "Password123!")
+    conversation = client.post("/api/v1/messages/start", json={"username": "react_receiver"}, headers=headers).json()
+    messages_url = f"/api/v1/messages/conversations/{conversation['id']}/messages"
+    first = client.post(messages_url, json={"content": "First"}, headers=headers).json()
+    second = client.post(messages_url, json={"content": "Second"}, headers=headers).json()
+
+    client.post(f"/api/v1/messages/messages/{first['id']}/reactions", json={"emoji": "👍"}, headers=headers)
+    client.post(f"/api/v1/messages/messages/{first['id']}/reactions", json={"emoji": "👍"}, headers=other_headers)
+    client.post(f"/api/v1/messages/messages/{second['id']}/reactions", json={"emoji": "🔥"}, headers=other_headers)
+    client.request("DELETE", f"/api/v1/messages/messages/{second['id']}/reactions", json={"emoji": "🔥"}, headers=other_headers)
+
+    response = client.get(messages_url, headers=other_headers)
+    assert response.status_code == 200
+    reactions = {message["id"]: message["reactions"] for message in response.json()}
+    assert reactions == {first["id"]: [{"emoji": "👍", "count": 2}], second["id"]: []}
+
+
+def test_unread_counts(client: TestClient):
+    headers = get_auth_headers(client, "unread_sender", "unread_sender@example.com", "Password123!")
+    other_headers = get_auth_headers(client, "unread_receiver", "unread_receiver@example.com", "Password123!")
+    conversation = client.post("/api/v1/messages/start", json={"username": "unread_receiver"}, headers=headers).json()
+    messages_url = f"/api/v1/messages/conversations/{conversation['id']}/messages"
+    client.post(messages_url, json={"content": "One"}, headers=headers)
+    client.post(messages_url, json={"content": "Two"}, headers=headers)
+
+    counts = client.get("/api/v1/messages/unread-counts", headers=other_headers).json()
+    assert counts == {"total": 2, "conversations": {str(conversation["id"]): 2}}
+    assert client.get("/api/v1/messages/unread-counts", headers=headers).json()["total"] == 0
+    conversations = client.get("/api/v1/messages/conversations", headers=other_headers).json()
+    assert conversations[0]["unread_count"] == 2
+
+    client.get(messages_url, headers=other_headers)
+
+    counts = client.get("/api/v1/messages/unread-counts", headers=other_headers).json()
+    assert counts == {"total": 0, "conversations": {}}
+    conversations = client.get("/api/v1/messages/conversations", headers=other_headers).json()
+    assert conversations[0]["unread_count"] == 0
+
+
+def test_mark_recent_messages_read_patches_only_the_receivers_messages(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(recent_messages, "get_redis", lambda: client)
+    messages = [
+        (1, {"id": 1, "receiver_id": 7, "content": '"is_read":false', "is_read": False}),
+        (2, {"id": 2, "receiver_id": 8, "content": "reply", "is_read": False}),
+        (3, {"id": 3, "receiver_id": 7, "content": "later", "is_read": False}),
+    ]
+    recent_messages.store_recent_messages(5, [(message_id, orjson.dumps(message)) for message_id, message in messages], True)
+
+    recent_messages.mark_recent_messages_read(5, 7, 2)
+
+    values = recent_messages.read_recent_message_values(5, [1, 2, 3])
+    assert [orjson.loads(value)["is_read"] for value in values] == [True, False, False]
+    assert orjson.loads(values[0])["content"] == '"is_read":false'
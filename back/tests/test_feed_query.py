@@ -0,0 +1,107 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from infrastructure.db import models
+from infrastructure.db.session import Base
+from infrastructure.repositories.question_repository import QuestionRepository
+
+# Point this at a disposable Postgres database to also check the production plan.
+POSTGRES_TEST_URL = os.getenv("POSTGRES_TEST_URL")
+
+VIEWER_ID = 1
+AUTHORS = 200
+FOLLOWED_AUTHORS = 150
+ANSWERS_PER_AUTHOR = 50
+
+
+def seed_feed_dataset(session):
+    now = datetime(2026, 1, 1)
+    session.bulk_insert_mappings(models.User, [
+        {"id": user_id, "username": f"feed_user_{user_id}", "email": f"feed_user_{user_id}@example.com"}
+        for user_id in range(1, AUTHORS + 2)
+    ])
+    session.bulk_insert_mappings(models.Follow, [
+        {"follower_id": VIEWER_ID, "followed_id": author_id}
+        for author_id in range(2, FOLLOWED_AUTHORS + 2)
+    ])
+    session.bulk_insert_mappings(models.Question, [
+        {"id": 1, "content": "Seed?", "receiver_id": 2, "asker_id": VIEWER_ID}
+    ])
+    session.bulk_insert_mappings(models.Answer, [
+        {
+            "content": "Seed answer",
+            "question_id": 1,
+            "author_id": author_id,
+            "created_at": now - timedelta(minutes=author_id * ANSWERS_PER_AUTHOR + n),
+        }
+        for author_id in range(2, AUTHORS + 2)
+        for n in range(ANSWERS_PER_AUTHOR)
+    ])
+    session.commit()
+
+
+def capture_feed_statements(session, run):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "FROM answers" in statement:
+            statements.append((statement, parameters))
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def run_feed_queries(session):
+    repo = QuestionRepository(session)
+    first_page = repo.get_feed(VIEWER_ID, 0, 10)
+    assert len(first_page) == 10
+    last = first_page[-1]
+    next_page = repo.get_feed_before(VIEWER_ID, last.created_at, last.id, 10)
+    assert len(next_page) == 10
+    assert {answer.author_id for answer in first_page + next_page} <= set(range(2, FOLLOWED_AUTHORS + 2))
+
+
+def explain_feed_statements(engine):
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        seed_feed_dataset(session)
+        session.connection().exec_driver_sql("ANALYZE")
+        statements = capture_feed_statements(session, lambda: run_feed_queries(session))
+        # One statement per page: the follow list is resolved inside the query.
+        assert len(statements) == 2
+        plans = []
+        for statement, parameters in statements:
+            assert "FROM follows" in statement
+            prefix = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+            rows = session.connection().exec_driver_sql(f"{prefix} {statement}", parameters).fetchall()
+            plans.append("\n".join(str(row[-1]) for row in rows))
+        return plans
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_feed_query_plan_sqlite(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'feed.db'}")
+    for plan in explain_feed_statements(engine):
+        assert "SEARCH answers USING INDEX idx_answers_author_id_created_at_id" in plan
+        assert "SCAN answers" not in plan
+
+
+@pytest.mark.skipif(not POSTGRES_TEST_URL, reason="POSTGRES_TEST_URL not set")
+def test_feed_query_plan_postgres():
+    engine = create_engine(POSTGRES_TEST_URL)
+    for plan in explain_feed_statements(engine):
+        assert "Index" in plan
+        assert "Seq Scan on answers" not in plan
@@ -0,0 +1,114 @@
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+
+from application.services.question_service import QuestionService
+from core.config import settings
+from infrastructure.cache import feed_timeline
+from infrastructure.repositories.question_repository import QuestionRepository
+from infrastructure.repositories.user_repository import UserRepository
+
+
+def get_auth_headers(client: TestClient, username, email, password):
+    client.post(
+        "/api/v1/users/",
+        json={"username": username, "email": email, "password": password}
+    )
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": username, "password": password}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(feed_timeline, "get_redis", lambda: client)
+    return client
+
+
+def test_merge_feed_entries_interleaves_sources_newest_first():
+    service = QuestionService(None, None, None)
+    sources = [
+        [(9, 90.0), (5, 50.0), (1, 10.0)],
+        [(8, 80.0), (6, 60.0)],
+        [(7, 70.0), (5, 50.0)],
+    ]
+    assert [answer_id for answer_id, _ in service._merge_feed_entries(sources, 10)] == [9, 8, 7, 6, 5, 1]
+    assert [answer_id for answer_id, _ in service._merge_feed_entries(sources, 3)] == [9, 8, 7]
+
+
+def test_merge_feed_entries_breaks_ties_by_id():
+    service = QuestionService(None, None, None)
+    sources = [[(4, 100.0), (2, 100.0)], [(3, 100.0), (1, 100.0)]]
+    assert [answer_id for answer_id, _ in service._merge_feed_entries(sources, 10)] == [4, 3, 2, 1]
+
+
+def test_read_timeline_before_skips_ties_up_to_the_cursor(redis_client):
+    feed_timeline.rebuild_timeline(1, [(5, 100.0), (4, 100.0), (3, 100.0), (2, 90.0), (1, 80.0)], False)
+
+    entries, trimmed = feed_timeline.read_timeline_before(1, 100.0, 4, 2)
+    assert entries == [(3, 100.0), (2, 90.0)]
+    assert trimmed is False
+    entries, _ = feed_timeline.read_timeline_before(1, 100.0, 3, 10)
+    assert [answer_id for answer_id, _ in entries] == [2, 1]
+    entries, _ = feed_timeline.read_timeline(1, 1, 2)
+    assert [answer_id for answer_id, _ in entries] == [4, 3]
+
+
+def test_timeline_windows(client: TestClient, db, redis_client, monkeypatch):
+    viewer_headers = get_auth_headers(client, "tl_viewer", "tl_viewer@example.com", "Password123!")
+    author_headers = get_auth_headers(client, "tl_author", "tl_author@example.com", "Password123!")
+    viewer_id = client.get("/api/v1/users/me", headers=viewer_headers).json()["id"]
+    author_id = client.get("/api/v1/users/me", headers=author_headers).json()["id"]
+    client.post("/api/v1/users/tl_author/follow", headers=viewer_headers)
+    answers = []
+    for n in range(4):
+        question = client.post(
+            "/api/v1/questions/",
+            json={"content": f"Timeline {n}?", "receiver_id": author_id},
+            headers=viewer_headers
+        ).json()
+        answers.append(client.post(
+            f"/api/v1/questions/{question['id']}/answer",
+            json={"content": f"Timeline answer {n}", "question_id": question["id"]},
+            headers=author_headers
+        ).json())
+    # Answered within the same second, so most of them tie on created_at.
+    expected = [answer["id"] for answer in reversed(answers)]
+
+    service = QuestionService(QuestionRepository(db), None, UserRepository(db))
+    monkeypatch.setattr(settings, "FEED_TIMELINE_MAX_LENGTH", 10)
+    assert service._get_feed_from_timeline(viewer_id, 0, 10, None) == expected
+    assert redis_client.zcard(feed_timeline.timeline_key(viewer_id)) == 4
+
+    # Shorter than the maximum: the timeline is the whole feed, windows past
+    # its end are simply short or empty.
+    assert service._get_feed_from_timeline(viewer_id, 2, 5, None) == expected[2:]
+    assert service._get_feed_from_timeline(viewer_id, 10, 5, None) == []
+    cursor = f"{answers[2]['created_at']}|{expected[1]}"
+    assert service._get_feed_from_timeline(viewer_id, 0, 2, cursor) == expected[2:4]
+
+    # Past the tail of a trimmed timeline the database has to answer.
+    monkeypatch.setattr(settings, "FEED_TIMELINE_MAX_LENGTH", 3)
+    feed_timeline.drop_timeline(viewer_id)
+    assert service._get_feed_from_timeline(viewer_id, 0, 3, None) == expected[:3]
+    assert service._get_feed_from_timeline(viewer_id, 2, 5, None) is None
+
+    # Still trimmed after a deletion shrinks it below the maximum.
+    feed_timeline.remove_from_timelines([viewer_id], [expected[0]])
+    assert redis_client.zcard(feed_timeline.timeline_key(viewer_id)) == 2
+    assert service._get_feed_from_timeline(viewer_id, 1, 5, None) is None
+
+    # Pushes keep the timeline alive and trim it again.
+    feed_timeline.drop_timeline(viewer_id)
+    feed_timeline.rebuild_timeline(viewer_id, [(expected[2], 2.0), (expected[3], 1.0)], False)
+    redis_client.expire(feed_timeline.timeline_key(viewer_id), 5)
+    feed_timeline.push_to_timelines([viewer_id], expected[1], 3.0)
+    assert redis_client.ttl(feed_timeline.timeline_key(viewer_id)) > 5
+    assert not redis_client.exists(feed_timeline.trimmed_key(viewer_id))
+    feed_timeline.push_to_timelines([viewer_id], expected[0], 4.0)
+    assert redis_client.zcard(feed_timeline.timeline_key(viewer_id)) == 3
+    assert redis_client.exists(feed_timeline.trimmed_key(viewer_id))
@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+
+def get_auth_headers(client: TestClient, username, email, password):
+    client.post(
+        "/api/v1/users/",
+        json={"username": username, "email": email, "password": password}
+    )
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": username, "password": password}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_like_counter_and_is_liked(client: TestClient):
+    headers_fan = get_auth_headers(client, "like_fan", "like_fan@example.com", "Password123!")
+    headers_author = get_auth_headers(client, "like_author", "like_author@example.com", "Password123!")
+    author_id = client.get("/api/v1/users/me", headers=headers_author).json()["id"]
+
+    q_res = client.post(
+        "/api/v1/questions/",
+        json={"content": "Like me?", "receiver_id": author_id},
+        headers=headers_fan
+    )
+    q_id = q_res.json()["id"]
+    a_res = client.post(
+        f"/api/v1/questions/{q_id}/answer",
+        json={"content": "Sure", "question_id": q_id},
+        headers=headers_author
+    )
+    a_id = a_res.json()["id"]
+    client.post("/api/v1/users/like_author/follow", headers=headers_fan)
+
+    # Liking twice must not count twice
+    assert client.post(f"/api/v1/questions/answers/{a_id}/like", headers=headers_fan).status_code == 200
+    assert client.post(f"/api/v1/questions/answers/{a_id}/like", headers=headers_fan).status_code == 200
+
+    feed = client.get("/api/v1/questions/feed", headers=headers_fan).json()
+    answer = [item for item in feed if item["id"] == a_id][0]
+    assert answer["likes_count"] == 1
+    assert answer["is_liked"] is True
+
+    answers = client.get("/api/v1/users/like_author/answers").json()
+    assert answers[0]["likes_count"] == 1
+    assert answers[0]["is_liked"] is False
+
+    assert client.delete(f"/api/v1/questions/answers/{a_id}/like", headers=headers_fan).status_code == 200
+    assert client.delete(f"/api/v1/questions/answers/{a_id}/like", headers=headers_fan).status_code == 200
+
+    feed = client.get("/api/v1/questions/feed", headers=headers_fan).json()
+    answer = [item for item in feed if item["id"] == a_id][0]
+    assert answer["likes_count"] == 0
+    assert answer["is_liked"] is False
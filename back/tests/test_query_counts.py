@@ -0,0 +1,79 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from core.config import settings
+
+
+def get_auth_headers(client: TestClient, username, email, password):
+    client.post(
+        "/api/v1/users/",
+        json={"username": username, "email": email, "password": password}
+    )
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": username, "password": password}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def count_queries(db, run):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+def test_page_query_count_does_not_grow_with_page_size(client: TestClient, db, monkeypatch):
+    receiver_headers = get_auth_headers(client, "qc_receiver", "qc_receiver@example.com", "Password123!")
+    viewer_headers = get_auth_headers(client, "qc_viewer", "qc_viewer@example.com", "Password123!")
+    receiver_id = client.get("/api/v1/users/me", headers=receiver_headers).json()["id"]
+    client.post("/api/v1/users/qc_receiver/follow", headers=viewer_headers)
+    askers = [
+        get_auth_headers(client, f"qc_asker_{n}", f"qc_asker_{n}@example.com", "Password123!")
+        for n in range(2)
+    ]
+    answer_id = None
+    for n in range(8):
+        question = client.post(
+            "/api/v1/questions/",
+            json={"content": f"Question {n}?", "receiver_id": receiver_id},
+            headers=askers[n % 2]
+        ).json()
+        if n < 6:
+            answer_id = client.post(
+                f"/api/v1/questions/{question['id']}/answer",
+                json={"content": f"Answer {n}", "question_id": question["id"]},
+                headers=receiver_headers
+            ).json()["id"]
+    # One comment per distinct user.
+    for headers in [receiver_headers, viewer_headers, *askers]:
+        client.post(f"/api/v1/questions/answers/{answer_id}/comments", json={"content": "Nice", "answer_id": answer_id}, headers=headers)
+
+    # Every page is read straight from the database.
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "none")
+    pages = [
+        ("/api/v1/questions/received", receiver_headers, 2),
+        ("/api/v1/questions/feed", viewer_headers, 6),
+        ("/api/v1/users/qc_receiver/answers", viewer_headers, 6),
+        (f"/api/v1/questions/answers/{answer_id}/comments", viewer_headers, 4),
+    ]
+    for path, headers, total in pages:
+        counts = []
+        for limit in (1, total):
+            def fetch():
+                response = client.get(f"{path}?limit={limit}", headers=headers)
+                assert response.status_code == 200
+                assert len(response.json()) == limit
+            db.expire_all()
+            counts.append(count_queries(db, fetch))
+        # Auth, the page itself, its relationships and one batch of users.
+        assert counts[0] == counts[1] <= 8, (path, counts)
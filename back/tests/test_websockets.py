@@ -0,0 +1,123 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from core.config import settings
+from infrastructure import websockets
+from infrastructure.websockets import ConnectionManager
+
+
+class BlockingWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+        self.release = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        await self.release.wait()
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+@pytest.fixture(autouse=True)
+def local_delivery(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_URL", None)
+    monkeypatch.setattr(settings, "WEBSOCKET_SEND_QUEUE_SIZE", 2)
+
+
+async def connect_blocked_client(manager):
+    websocket = BlockingWebSocket()
+    await manager.connect(websocket, 1)
+    # The writer picks up the first message and blocks sending it.
+    await manager.send_personal_message("m0", 1)
+    await asyncio.sleep(0)
+    return websocket
+
+
+def test_full_queue_drops_oldest(monkeypatch):
+    monkeypatch.setattr(settings, "WEBSOCKET_SEND_OVERFLOW", "drop_oldest")
+
+    async def run():
+        manager = ConnectionManager()
+        websocket = await connect_blocked_client(manager)
+        for n in range(1, 4):
+            # Never waits on the blocked client.
+            await asyncio.wait_for(manager.send_personal_message(f"m{n}", 1), 0.1)
+        websocket.release.set()
+        await asyncio.sleep(0.01)
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert websocket.sent == ["m0", "m2", "m3"]
+    assert websocket.closed_with is None
+
+
+def test_full_queue_disconnects(monkeypatch):
+    monkeypatch.setattr(settings, "WEBSOCKET_SEND_OVERFLOW", "disconnect")
+
+    async def run():
+        manager = ConnectionManager()
+        websocket = await connect_blocked_client(manager)
+        for n in range(1, 5):
+            await asyncio.wait_for(manager.send_personal_message(f"m{n}", 1), 0.1)
+        websocket.release.set()
+        await asyncio.sleep(0.01)
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert websocket.sent == ["m0"]
+    assert websocket.closed_with == 1013
+
+
+def test_disconnect_cancels_writer():
+    async def run():
+        manager = ConnectionManager()
+        websocket = await connect_blocked_client(manager)
+        writer = manager.active_connections[1][0].writer
+        await manager.disconnect(websocket, 1)
+        await asyncio.sleep(0)
+        return manager, writer
+
+    manager, writer = asyncio.run(run())
+    assert writer.cancelled()
+    assert manager.active_connections == {}
+
+
+def test_reconnect_during_unsubscribe_keeps_the_channel(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(settings, "REDIS_URL", "redis://fake")
+    monkeypatch.setattr(websockets, "build_async_connection_pool", lambda _: fakeredis.aioredis.FakeRedis(server=server).connection_pool)
+
+    async def run():
+        publisher = fakeredis.aioredis.FakeRedis(server=server)
+        monkeypatch.setattr(websockets, "get_async_redis", lambda: publisher)
+        manager = ConnectionManager()
+        first, second = BlockingWebSocket(), BlockingWebSocket()
+        second.release.set()
+        await manager.connect(first, 1)
+
+        unsubscribe = manager._pubsub.unsubscribe
+
+        async def slow_unsubscribe(*channels):
+            await asyncio.sleep(0.05)
+            await unsubscribe(*channels)
+
+        manager._pubsub.unsubscribe = slow_unsubscribe
+        # The last tab closes while a new one opens.
+        await asyncio.gather(manager.disconnect(first, 1), manager.connect(second, 1))
+        await manager.send_personal_message("hello", 1)
+        for _ in range(100):
+            if second.sent:
+                break
+            await asyncio.sleep(0.01)
+        manager._listener.cancel()
+        return second
+
+    websocket = asyncio.run(run())
+    assert websocket.sent == ["hello"]